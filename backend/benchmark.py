@@ -0,0 +1,654 @@
+"""Offline benchmark suite for the OCR and summarization hot paths.
+
+Generates synthetic document images, PDFs and long texts, times the backend
+functions on CPU and writes the results to JSON so runs can be compared
+across commits. OpenRouter is replaced by a local stub server.
+
+Usage:
+    python benchmark.py --iterations 5 --output bench_results.json
+    python benchmark.py --compare bench_results.json --output new_results.json
+"""
+import argparse
+import base64
+import collections
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Benchmarks always run on CPU and never reach the network
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '')
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from uploads import PeakMemoryTracker
+
+SAMPLE_TEXT = {
+    'en': "The quarterly report shows steady growth in every region and the board approved the new budget",
+    'fr': "Le rapport trimestriel montre une croissance reguliere dans chaque region et le conseil a approuve le budget",
+    'es': "El informe trimestral muestra un crecimiento constante en cada region y la junta aprobo el nuevo presupuesto",
+    'de': "Der Quartalsbericht zeigt ein stetiges Wachstum in jeder Region und der Vorstand hat das Budget genehmigt",
+}
+
+FONT_SIZES = (14, 24, 40)
+NOISE_LEVELS = (0, 15, 40)
+
+VOCABULARY = (
+    "system data model network analysis report market growth customer product service team "
+    "research result process quality design policy energy health education finance project "
+    "security software hardware cloud storage performance latency throughput memory document "
+    "language summary research study evidence method approach outcome review budget region"
+).split()
+
+
+def find_fonts(limit=3):
+    """Return up to `limit` TrueType fonts installed on this machine (None means PIL's default)"""
+    patterns = ['/usr/share/fonts/**/*.ttf', '/usr/local/share/fonts/**/*.ttf', '/Library/Fonts/*.ttf',
+                'C:\\Windows\\Fonts\\*.ttf']
+    fonts = []
+    for pattern in patterns:
+        fonts.extend(sorted(glob.glob(pattern, recursive=True)))
+    return fonts[:limit] or [None]
+
+
+def load_font(path, size):
+    if path:
+        return ImageFont.truetype(path, size)
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has no sized default font
+        return ImageFont.load_default()
+
+
+def document_lines(text, lines=12):
+    """The lines of text render_document puts on the page (the OCR ground truth)"""
+    words = text.split()
+    return [' '.join(words[(i * 5) % len(words):(i * 5) % len(words) + 8] or words[:8]) for i in range(lines)]
+
+
+def render_document(text, font_path, font_size, noise, seed, width=1240, lines=12):
+    """Render `lines` lines of text onto a white page and add gaussian noise"""
+    image = Image.new('L', (width, int(font_size * 1.6 * lines) + 80), color=255)
+    draw = ImageDraw.Draw(image)
+    font = load_font(font_path, font_size)
+    y = 40
+    for line in document_lines(text, lines):
+        draw.text((40, y), line, fill=0, font=font)
+        y += int(font_size * 1.6)
+
+    pixels = np.asarray(image, dtype=np.float32)
+    if noise:
+        rng = np.random.default_rng(seed)
+        pixels = pixels + rng.normal(0, noise, pixels.shape)
+    pixels = np.clip(pixels, 0, 255).astype(np.uint8)
+    return Image.fromarray(pixels).convert('RGB')
+
+
+def generate_text(words, seed):
+    """Generate a synthetic long text of roughly `words` words"""
+    rng = random.Random(seed)
+    sentences = []
+    count = 0
+    while count < words:
+        length = rng.randint(6, 28)
+        sentence = ' '.join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize() + '.')
+        count += length
+    # Group into paragraphs of ~5 sentences
+    paragraphs = [' '.join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return '\n\n'.join(paragraphs)
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def generate_pdf(pages, seed, lines_per_page=40):
+    """Build a minimal text PDF with `pages` pages using the built-in Helvetica font"""
+    rng = random.Random(seed)
+    page_streams = []
+    for _ in range(pages):
+        lines = [' '.join(rng.choice(VOCABULARY) for _ in range(10)) for _ in range(lines_per_page)]
+        body = ' T* '.join(f"({_pdf_escape(line)}) Tj" for line in lines)
+        page_streams.append(f"BT /F1 11 Tf 14 TL 50 790 Td {body} ET".encode('latin-1'))
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then (page, content) pairs
+    page_ids = [4 + 2 * i for i in range(pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{pid} 0 R' for pid in page_ids)}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for pid, stream in zip(page_ids, page_streams):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {pid + 1} 0 R >>".encode())
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+# A3 at 600 dpi, the size of scan tiling is meant for, and the share of that page's
+# OCR time merging its tiles may take
+A3_600DPI = (7016, 9921)
+TILING_MERGE_BUDGET = 0.05
+
+
+def synthetic_tile_results(width, height, tile_size, overlap, seed, line_pitch=80, line_height=50):
+    """Simulate per-tile OCR output for a page of text segments.
+
+    Returns (tile_results, segments): every tile reports the segments that lie
+    within its rows, clipped at its left and right edges and keeping only the
+    words it sees whole, as EasyOCR does for text cut by a tile edge. `segments`
+    is the (rect, text) ground truth a correct merge gives back.
+    """
+    from tiling import tile_grid
+
+    rng = random.Random(seed)
+    segments = []
+    for y in range(40, height - line_height - 40, line_pitch):
+        x = 60
+        while True:
+            words = rng.randint(3, 10)
+            slot = rng.randint(50, 90)
+            if x + words * slot > width - 60:
+                break
+            segments.append(([x, y, x + words * slot, y + line_height],
+                             [f"w{len(segments)}_{i}" for i in range(words)], slot))
+            x += words * slot + rng.randint(40, 100)
+
+    tile_results = []
+    for tile in tile_grid(width, height, tile_size, overlap):
+        tx0, ty0, tx1, ty1 = tile
+        detections = []
+        for (x0, y0, x1, y1), words, slot in segments:
+            if y0 < ty0 or y1 > ty1 or x1 <= tx0 or x0 >= tx1:
+                continue
+            left, right = max(x0, tx0), min(x1, tx1)
+            seen = [word for i, word in enumerate(words) if x0 + i * slot >= left and x0 + (i + 1) * slot <= right]
+            if seen:
+                box = [[left, y0], [right, y0], [right, y1], [left, y1]]
+                detections.append((box, ' '.join(seen), rng.uniform(0.6, 0.99)))
+        tile_results.append((tile, detections))
+    return tile_results, [(rect, ' '.join(words)) for rect, words, _ in segments]
+
+
+class OpenRouterStubHandler(BaseHTTPRequestHandler):
+    """Answers chat completion requests with a canned AI-style summary.
+
+    Can add latency (with jitter) and answer 429 either at random
+    (`rate_limit_probability`) or once `requests_per_minute` is exceeded.
+    """
+    latency = 0.0
+    jitter = 0.0
+    rate_limit_probability = 0.0
+    requests_per_minute = 0
+    # Shared per server class: timestamps of recent accepted requests
+    recent = None
+    lock = None
+
+    def _rate_limited(self):
+        if self.rate_limit_probability and random.random() < self.rate_limit_probability:
+            return True
+        if self.requests_per_minute:
+            now = time.time()
+            with self.lock:
+                while self.recent and self.recent[0] < now - 60:
+                    self.recent.popleft()
+                if len(self.recent) >= self.requests_per_minute:
+                    return True
+                self.recent.append(now)
+        return False
+
+    def _send_json(self, status, body, headers=None):
+        body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self._rate_limited():
+            self._send_json(429, {'error': {'code': 429, 'message': 'Rate limit exceeded'}}, {'Retry-After': '60'})
+            return
+        prompt = payload.get('messages', [{}])[-1].get('content', '')
+        words = prompt.split()[-60:]
+        content = ("Here's a concise summary of the text:\n\n"
+                   "1. **Overview**: " + ' '.join(words[:20]) + "\n"
+                   "2. **Details**: " + ' '.join(words[20:40]) + "\n"
+                   "3. **Outcome**: " + ' '.join(words[40:]) + "\n\n"
+                   "This summary captures the main points.")
+        self._send_json(200, {'choices': [{'message': {'role': 'assistant', 'content': content}}]})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_openrouter_stub(latency=0.0, jitter=0.0, rate_limit_probability=0.0, requests_per_minute=0,
+                          host='127.0.0.1', port=0):
+    """Start the stub (on a free local port by default) and point the backend at it"""
+    handler = type('Handler', (OpenRouterStubHandler,), {
+        'latency': latency, 'jitter': jitter, 'rate_limit_probability': rate_limit_probability,
+        'requests_per_minute': requests_per_minute, 'recent': collections.deque(), 'lock': threading.Lock()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.api_url = f"http://{host}:{server.server_port}/api/v1/chat/completions"
+    os.environ['OPENROUTER_API_URL'] = server.api_url
+    os.environ['OPENROUTER_API_KEY'] = 'benchmark-stub-key'
+    return server
+
+
+# Resets the kernel's peak RSS before each benchmark (Linux), so every row reports its own
+# peak rather than the largest one run so far; elsewhere the process lifetime peak is reported
+memory_tracker = PeakMemoryTracker()
+
+
+def peak_rss_mb():
+    peak = memory_tracker.stop()
+    return round(peak / (1024 * 1024), 1) if peak is not None else None
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_benchmark(name, fn, iterations, warmup=1, units=1):
+    """Time `fn` and return latency percentiles, throughput and peak RSS"""
+    try:
+        for _ in range(warmup):
+            fn()
+        memory_tracker.start()
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    except Exception as e:
+        memory_tracker.stop()
+        print(f"  {name}: skipped ({e})")
+        return {'name': name, 'error': str(e)}
+
+    total = sum(timings)
+    result = {
+        'name': name,
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'mean_ms': round(total / len(timings) * 1000, 3),
+        'throughput_per_s': round(units * len(timings) / total, 3) if total > 0 else None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+    print(f"  {name}: p50 {result['p50_ms']}ms  p95 {result['p95_ms']}ms  "
+          f"{result['throughput_per_s']}/s  rss {result['peak_rss_mb']}MB")
+    return result
+
+
+def ocr_benchmarks(app_module, args, workdir):
+    results = []
+    fonts = find_fonts()
+    client = app_module.app.test_client()
+    for lang_code, text in SAMPLE_TEXT.items():
+        if args.languages and lang_code not in args.languages:
+            continue
+        for font_index, font_path in enumerate(fonts):
+            for font_size in FONT_SIZES:
+                for noise in NOISE_LEVELS:
+                    tag = f"{lang_code}/font{font_index}/{font_size}px/noise{noise}"
+                    image = render_document(text, font_path, font_size, noise, args.seed + zlib.crc32(tag.encode()))
+                    path = os.path.join(workdir, f"doc_{lang_code}_{font_index}_{font_size}_{noise}.png")
+                    image.save(path)
+                    with open(path, 'rb') as f:
+                        encoded = base64.b64encode(f.read()).decode()
+
+                    for model in ('easyocr', 'pytesseract', 'cascade'):
+                        results.append(run_benchmark(
+                            f"extract_text[{model}] {tag}",
+                            lambda: app_module.extract_text(path, model, lang_code),
+                            args.iterations))
+                        results.append(run_benchmark(
+                            f"camera_feed[{model}] {tag}",
+                            lambda: _check_response(client.post('/camera_feed', json={
+                                'image': encoded, 'model': model, 'language': lang_code})),
+                            args.iterations))
+    return results
+
+
+def _check_response(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def pdf_benchmarks(app_module, args):
+    import io
+    results = []
+    for pages in (1, 10, 50):
+        data = generate_pdf(pages, args.seed + pages)
+        results.append(run_benchmark(
+            f"extract_text_from_pdf {pages}p",
+            lambda: _require(app_module.extract_text_from_pdf(io.BytesIO(data))),
+            args.iterations, units=pages))
+    return results
+
+
+def _require(value):
+    if value is None:
+        raise RuntimeError("returned None")
+    return value
+
+
+def nltk_data_error(app_module):
+    """Why the summarizers cannot run here, or None.
+
+    Without NLTK's tokenizer and stop word data the summarizers catch the
+    LookupError and return their input, which would be timed as a summary.
+    """
+    try:
+        app_module.ensure_nltk_data()
+        app_module.nltk.sent_tokenize("The first sentence. The second sentence.")
+        app_module.nltk.word_tokenize("The first sentence.")
+        app_module.nltk.corpus.stopwords.words('english')
+    except LookupError as e:
+        # NLTK's message is a banner; keep its first line of text
+        lines = [line.strip() for line in str(e).splitlines() if line.strip(' *')]
+        return f"NLTK data missing: {lines[0] if lines else e}"
+    return None
+
+
+def _summary(summary, text):
+    """Fail a summarization benchmark whose summarizer fell back to returning its input"""
+    if not summary or summary == "Unable to extract key phrases":
+        raise RuntimeError("returned no summary")
+    if len(summary) >= len(text):
+        raise RuntimeError("returned its input instead of a summary")
+    return summary
+
+
+def summarization_benchmarks(app_module, args):
+    error = nltk_data_error(app_module)
+    if error:
+        print(f"  summarization: skipped ({error})")
+        return [{'name': 'summarization', 'error': error}]
+
+    results = []
+    app_module.openrouter_rate_limiter.requests_per_minute = 10 ** 9
+    app_module.openrouter_rate_limiter.requests_per_day = 10 ** 9
+    for words in (500, 5000, 20000):
+        text = generate_text(words, args.seed + words)
+        tag = f"{words}w"
+        for algorithm in ('textrank', 'lsa', 'luhn', 'smart'):
+            results.append(run_benchmark(
+                f"extractive_summarize[{algorithm}] {tag}",
+                lambda: _summary(app_module.extractive_summarize(text, algorithm, 5), text),
+                args.iterations))
+        results.append(run_benchmark(f"abstractive_summarize {tag}",
+                                     lambda: _summary(app_module.abstractive_summarize(text, 5), text),
+                                     args.iterations))
+        results.append(run_benchmark(f"bullet_point_summarize {tag}",
+                                     lambda: _summary(app_module.bullet_point_summarize(text, 5), text),
+                                     args.iterations))
+        results.append(run_benchmark(f"extract_key_phrases {tag}",
+                                     lambda: _summary(app_module.extract_key_phrases(text, 10), text),
+                                     args.iterations))
+        results.append(run_benchmark(
+            f"openrouter_summarize[stub] {tag}",
+            lambda: _require(app_module.openrouter_summarize(text, 'medium')[0]),
+            args.iterations))
+
+    ai_response = ("Here's a concise summary of the text:\n\n" +
+                   '\n'.join(f"{i}. **Point {i}**: {generate_text(40, args.seed + i)}" for i in range(1, 8)) +
+                   "\n\nThis summary captures the essential points.")
+    results.append(run_benchmark("clean_ai_response", lambda: app_module.clean_ai_response(ai_response),
+                                 args.iterations * 20))
+    return results
+
+
+def backend_benchmarks(app_module, args):
+    """Compare latency and accuracy of the OCR inference backends on the same pages"""
+    import difflib
+    from inference_backend import build_reader
+
+    font_path = find_fonts()[0]
+    pages = []
+    for font_size in FONT_SIZES:
+        for noise in NOISE_LEVELS:
+            tag = f"en/{font_size}px/noise{noise}"
+            image = render_document(SAMPLE_TEXT['en'], font_path, font_size, noise, args.seed + zlib.crc32(tag.encode()))
+            pages.append((tag, np.asarray(image)[:, :, ::-1].copy(), ' '.join(document_lines(SAMPLE_TEXT['en']))))
+
+    results = []
+    baseline = {}
+    for backend in args.backends:
+        try:
+            reader = build_reader(['en'], backend, args.threads)
+        except Exception as e:
+            print(f"  backend[{backend}]: skipped ({e})")
+            results.append({'name': f"backend[{backend}]", 'error': str(e)})
+            continue
+
+        for tag, page, truth in pages:
+            def recognize():
+                return ' '.join(res[1] for res in app_module.run_easyocr(reader, page))
+            result = run_benchmark(f"backend[{backend}] {tag}", recognize, args.iterations)
+            if 'error' not in result:
+                text = recognize()
+                baseline.setdefault(tag, text)
+                result['accuracy'] = round(difflib.SequenceMatcher(None, text, truth).ratio(), 4)
+                result['agreement_with_first_backend'] = round(
+                    difflib.SequenceMatcher(None, text, baseline[tag]).ratio(), 4)
+                print(f"    accuracy {result['accuracy']}  agreement {result['agreement_with_first_backend']}")
+            results.append(result)
+    return results
+
+
+def dedup_benchmarks(app_module, args, workdir):
+    """Cost of the near-duplicate checks, and a cache hit against the OCR it replaces"""
+    from dedupe import PerceptualCache, find_near_duplicates
+
+    font_path = find_fonts()[0]
+    image = render_document(SAMPLE_TEXT['en'], font_path, 24, 15, args.seed)
+    frame = np.asarray(image)[:480, :640, ::-1].copy()
+    path = os.path.join(workdir, 'dedup_page.png')
+    image.save(path)
+
+    results = []
+    original_cache = app_module.page_cache
+    app_module.DEDUP = True
+    try:
+        results.append(run_benchmark("image_fingerprint[page]", lambda: app_module.image_fingerprint(path),
+                                     args.iterations * 4))
+        results.append(run_benchmark("image_fingerprint[frame]", lambda: app_module.image_fingerprint(frame),
+                                     args.iterations * 4))
+        def empty_cache():
+            return PerceptualCache(1, app_module.DEDUP_IMAGE_DISTANCE, app_module.DEDUP_PIXEL_TOLERANCE)
+
+        for model in ('easyocr', 'pytesseract'):
+            key = ('benchmark', model)
+
+            def miss():
+                # A fresh cache each time, so every call fingerprints, misses and runs OCR
+                app_module.page_cache = empty_cache()
+                return app_module.cached_ocr(frame, key, lambda: app_module.camera_frame_ocr(frame, model))
+
+            def hit():
+                result, dedup = app_module.cached_ocr(frame, key, lambda: app_module.camera_frame_ocr(frame, model))
+                if dedup is None:
+                    raise RuntimeError("expected a cache hit")
+                return result
+
+            results.append(run_benchmark(f"dedup_miss[{model}] frame", miss, args.iterations))
+            if 'error' not in results[-1]:
+                # miss() leaves the frame in a fresh cache, so every hit() call reuses it
+                miss()
+                results.append(run_benchmark(f"dedup_hit[{model}] frame", hit, args.iterations))
+    finally:
+        app_module.page_cache = original_cache
+        app_module.DEDUP = False
+
+    pages = [generate_text(400, args.seed + i % 150) for i in range(200)]
+    results.append(run_benchmark("find_near_duplicates 200 pages",
+                                 lambda: find_near_duplicates(pages, app_module.DEDUP_TEXT_THRESHOLD),
+                                 args.iterations))
+    text = ' '.join(generate_text(2000, args.seed + i % 3) for i in range(5))
+    results.append(run_benchmark("remove_duplicate_sentences 10000w",
+                                 lambda: app_module.remove_duplicate_sentences(text), args.iterations))
+    return results
+
+
+def tiling_benchmarks(app_module, args):
+    """Merging the tiles of an A3 600 dpi scan against the OCR of those tiles"""
+    from tiling import merge_tile_results
+
+    width, height = A3_600DPI
+    tile_results, segments = synthetic_tile_results(width, height, app_module.TILE_SIZE, app_module.TILE_OVERLAP,
+                                                    args.seed)
+    detections = sum(len(found) for _, found in tile_results)
+    expected = sorted(text for _, text in segments)
+
+    def merge():
+        merged = merge_tile_results(tile_results, width, height, app_module.TILE_OVERLAP)
+        if sorted(text for _, text, _ in merged) != expected:
+            raise RuntimeError(f"merged {len(merged)} detections, expected the {len(expected)} page segments")
+        return merged
+
+    merge_result = run_benchmark(
+        f"merge_tile_results A3@600dpi {len(tile_results)} tiles {detections} detections", merge, args.iterations)
+
+    # Reference: EasyOCR on one full tile of text
+    font_path = find_fonts()[0]
+    tile_page = Image.new('L', (app_module.TILE_SIZE, app_module.TILE_SIZE), color=255)
+    draw = ImageDraw.Draw(tile_page)
+    font = load_font(font_path, 40)
+    for row, y in enumerate(range(40, app_module.TILE_SIZE - 80, 80)):
+        draw.text((40, y), generate_text(12, args.seed + row).split('\n')[0][:70], fill=0, font=font)
+    tile_image = np.asarray(tile_page.convert('RGB'))[:, :, ::-1].copy()
+    reader = app_module.get_reader('en')
+    ocr_result = run_benchmark(f"easyocr tile {app_module.TILE_SIZE}px",
+                               lambda: app_module.run_easyocr(reader, tile_image), args.iterations)
+
+    if 'error' not in merge_result and 'error' not in ocr_result:
+        page_ocr_ms = ocr_result['p50_ms'] * len(tile_results)
+        merge_result['share_of_ocr'] = round(merge_result['p50_ms'] / page_ocr_ms, 5)
+        print(f"    merge is {merge_result['share_of_ocr'] * 100:.2f}% of the page's OCR time ({page_ocr_ms:.0f}ms)")
+        if merge_result['share_of_ocr'] > TILING_MERGE_BUDGET:
+            print(f"    WARNING: merge exceeds {TILING_MERGE_BUDGET * 100:.0f}% of the OCR time")
+    return [merge_result, ocr_result]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_path, results):
+    """Print p50 changes against a previous results file"""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {r['name']: r for r in json.load(f)['results'] if 'p50_ms' in r}
+    print(f"\nComparison with {previous_path} (p50):")
+    for result in results:
+        before = previous.get(result['name'])
+        if not before or 'p50_ms' not in result or not before['p50_ms']:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+        print(f"  {result['name']}: {before['p50_ms']}ms -> {result['p50_ms']}ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OCR and summarization benchmarks")
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="previous results JSON to compare against")
+    parser.add_argument('--suites', nargs='+', default=['ocr', 'pdf', 'summarize'],
+                        choices=['ocr', 'pdf', 'summarize', 'backends', 'dedup', 'tiling'])
+    parser.add_argument('--backends', nargs='+', default=['torch', 'torch-fp32', 'onnx', 'onnx-int8'],
+                        help="OCR inference backends to compare (the first one is the accuracy baseline)")
+    parser.add_argument('--threads', type=int, default=0, help="inference threads for the backends suite")
+    parser.add_argument('--languages', nargs='+', help="limit OCR benchmarks to these language codes")
+    parser.add_argument('--stub-latency', type=float, default=0.0,
+                        help="seconds the OpenRouter stub waits before answering")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    stub = start_openrouter_stub(args.stub_latency)
+
+    # Timed calls repeat the same page, so the near-duplicate cache would turn every iteration
+    # after the first into a cache hit; the dedup suite enables it explicitly. Set here rather
+    # than at import so tools importing the helpers (loadtest.py) keep the caller's setting.
+    os.environ['DEDUP'] = 'off'
+    import main_test as app_module
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        if 'ocr' in args.suites:
+            print("OCR benchmarks")
+            results.extend(ocr_benchmarks(app_module, args, workdir))
+        if 'pdf' in args.suites:
+            print("PDF benchmarks")
+            results.extend(pdf_benchmarks(app_module, args))
+        if 'backends' in args.suites:
+            print("OCR inference backend comparison")
+            results.extend(backend_benchmarks(app_module, args))
+        if 'dedup' in args.suites:
+            print("Near-duplicate detection benchmarks")
+            results.extend(dedup_benchmarks(app_module, args, workdir))
+        if 'tiling' in args.suites:
+            print("Tiled OCR merge benchmarks")
+            results.extend(tiling_benchmarks(app_module, args))
+        if 'summarize' in args.suites:
+            print("Summarization benchmarks")
+            results.extend(summarization_benchmarks(app_module, args))
+    stub.shutdown()
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'iterations': args.iterations,
+        'seed': args.seed,
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(results)} results to {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""Near-duplicate detection for page images and text.
+
+Images are fingerprinted with a difference hash (dHash) and a thumbnail so
+rescans and repeated cover sheets can reuse earlier OCR results. Text is
+compared with MinHash signatures over word shingles, bucketed with LSH so
+finding the duplicates among n pages or sentences stays close to linear.
+"""
+import re
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def dhash(grey, hash_size=16):
+    """Difference hash of a grayscale image as a packed uint8 array (hash_size**2 bits)"""
+    import cv2
+    small = cv2.resize(grey, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1])
+
+
+def hamming_distances(hashes, fingerprint):
+    """Bit distance from `fingerprint` to each row of the 2-D array `hashes`"""
+    return np.unpackbits(np.bitwise_xor(hashes, fingerprint), axis=1).sum(axis=1)
+
+
+class ImageFingerprint:
+    """dHash for fast candidate lookup plus a thumbnail to verify a match.
+
+    A 256-bit hash cannot see a changed word on a page, so candidates are only
+    accepted after comparing thumbnails pixel by pixel.
+    """
+
+    def __init__(self, grey, thumbnail_width=1024):
+        import cv2
+        self.hash = dhash(grey)
+        width = min(thumbnail_width, grey.shape[1])
+        height = max(1, round(grey.shape[0] * width / grey.shape[1]))
+        self.thumbnail = cv2.resize(grey, (width, height), interpolation=cv2.INTER_AREA)
+
+    def compressed(self):
+        """Thumbnail as PNG bytes; pages compress to a small fraction of their raw size"""
+        import cv2
+        return cv2.imencode('.png', self.thumbnail)[1].tobytes()
+
+
+def thumbnails_match(thumbnail, png_bytes, tolerance=40):
+    """True if no neighbourhood of the two thumbnails differs by more than `tolerance` gray levels.
+
+    The 3x3 blur absorbs sensor noise and JPEG artifacts, while a changed
+    character still leaves a strong local difference.
+    """
+    import cv2
+    other = cv2.imdecode(np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if other is None or other.shape != thumbnail.shape:
+        return False
+    difference = cv2.blur(cv2.absdiff(thumbnail, other), (3, 3))
+    return int(difference.max()) <= tolerance
+
+
+class PerceptualCache:
+    """LRU cache of results keyed by image fingerprint.
+
+    Entries within `max_distance` bits of the query hash are candidates; the
+    first whose thumbnail matches within `tolerance` is returned.
+    """
+
+    def __init__(self, capacity=256, max_distance=8, tolerance=40):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.tolerance = tolerance
+        self._entries = OrderedDict()  # id -> (key, hash, compressed thumbnail, value)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key, fingerprint):
+        """Return (value, distance) for a matching cached image under `key`, or (None, None)"""
+        with self._lock:
+            candidates = [(entry_id, entry[1], entry[2]) for entry_id, entry in self._entries.items()
+                          if entry[0] == key]
+        if not candidates:
+            return None, None
+        distances = hamming_distances(np.stack([c[1] for c in candidates]), fingerprint.hash)
+        for index in np.argsort(distances, kind='stable'):
+            if distances[index] > self.max_distance:
+                break
+            entry_id, _, png_bytes = candidates[index]
+            if thumbnails_match(fingerprint.thumbnail, png_bytes, self.tolerance):
+                with self._lock:
+                    entry = self._entries.get(entry_id)
+                    if entry is None:
+                        continue
+                    self._entries.move_to_end(entry_id)
+                return entry[3], int(distances[index])
+        return None, None
+
+    def store(self, key, fingerprint, value):
+        png_bytes = fingerprint.compressed()
+        with self._lock:
+            self._entries[self._next_id] = (key, fingerprint.hash, png_bytes, value)
+            self._next_id += 1
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+
+def shingles(text, k=3):
+    """Set of k-word shingles of the normalized text (the whole text if it is shorter)"""
+    words = [word.lower() for word in WORD_PATTERN.findall(text)]
+    if len(words) <= k:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=64, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, MERSENNE_PRIME, num_perm).astype(np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, num_perm).astype(np.uint64)
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingle_set), dtype=np.uint64,
+                             count=len(shingle_set))
+        # crc32 < 2**32 and a < 2**31, so the products fit in uint64
+        return ((np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME).min(axis=0)
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(signature_a == signature_b))
+
+
+class NearDuplicateIndex:
+    """Incremental MinHash/LSH index: texts are added one at a time and each is
+    checked against everything added before it"""
+
+    def __init__(self, threshold=0.85, k=3, num_perm=64, bands=16):
+        self.threshold = threshold
+        self.k = k
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = defaultdict(list)
+        self.exact = {}
+        self.signatures = {}
+
+    def add(self, text, item_id):
+        """Index text under item_id unless it duplicates an indexed text.
+
+        Returns None for new text, or (id of the earlier text, similarity).
+        Empty texts are never duplicates and are not indexed.
+        """
+        normalized = ' '.join(WORD_PATTERN.findall(text.lower()))
+        if not normalized:
+            return None
+        if normalized in self.exact:
+            return self.exact[normalized], 1.0
+
+        # Only texts sharing at least one LSH band are compared
+        signature = self.hasher.signature(shingles(text, self.k))
+        band_keys = [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                     for band in range(self.bands)]
+        best = None
+        for candidate in {c for band_key in band_keys for c in self.buckets[band_key]}:
+            score = similarity(signature, self.signatures[candidate])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        if best is not None:
+            # Duplicates are not indexed, so later copies match the first occurrence
+            return best
+
+        self.exact[normalized] = item_id
+        self.signatures[item_id] = signature
+        for band_key in band_keys:
+            self.buckets[band_key].append(item_id)
+        return None
+
+
+def find_near_duplicates(texts, threshold=0.85, k=3, num_perm=64, bands=16):
+    """For each text, return (index of the earlier text it duplicates, similarity) or None.
+
+    Empty texts are never marked as duplicates.
+    """
+    index = NearDuplicateIndex(threshold, k, num_perm, bands)
+    return [index.add(text, i) for i, text in enumerate(texts)]
+
+
+def dedupe_sentences(sentences, threshold=0.85, k=3):
+    """Drop sentences that repeat an earlier one; returns (kept, removed_count)"""
+    matches = find_near_duplicates(sentences, threshold, k)
+    kept = [sentence for sentence, match in zip(sentences, matches) if match is None]
+    return kept, len(sentences) - len(kept)
@@ -0,0 +1,237 @@
+"""Server-side store for extracted and summarized text.
+
+Extraction endpoints save their output here and hand the client a document id;
+summarize and export then take that id instead of the full text. Documents
+expire after a TTL.
+
+Backends:
+    memory  per-process dict (default; ids are only valid on the worker that issued them)
+    sqlite  a local SQLite file shared by all workers on the node
+    file    one JSON file per document in a directory shared by all workers
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import closing
+
+BACKENDS = ('memory', 'sqlite', 'file')
+
+
+class DocumentStore:
+    """Base class; subclasses implement _save, _load, delete and purge"""
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+
+    def put(self, text, kind='text', metadata=None):
+        """Store text and return its document id"""
+        now = time.time()
+        document = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "text": text,
+            "metadata": metadata or {},
+            "created": now,
+            "expires": now + self.ttl
+        }
+        self._save(document)
+        return document["id"]
+
+    def get(self, document_id):
+        """Return the document dict, or None if it is unknown or expired"""
+        if not document_id:
+            return None
+        document = self._load(document_id)
+        if document is None:
+            return None
+        if document["expires"] < time.time():
+            self.delete(document_id)
+            return None
+        return document
+
+    def renew(self, document_id):
+        """Restart a document's TTL; returns False if it is unknown or already expired"""
+        document = self.get(document_id)
+        if document is None:
+            return False
+        self._save(dict(document, expires=time.time() + self.ttl))
+        return True
+
+
+class MemoryDocumentStore(DocumentStore):
+    """Keeps at most max_documents documents and max_bytes of (UTF-8) text, evicting
+    the least recently saved first; the newest document is always kept"""
+
+    def __init__(self, ttl=3600, max_documents=1000, max_bytes=64 * 1024 * 1024):
+        super().__init__(ttl)
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._documents = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def _save(self, document):
+        size = len(document["text"].encode('utf-8'))
+        with self._lock:
+            # Re-saving a document (renew) moves it to the back of the eviction order
+            self._remove_locked(document["id"])
+            self._documents[document["id"]] = document
+            self._sizes[document["id"]] = size
+            self.total_bytes += size
+            self._purge_locked()
+            # Oldest documents go first once either cap is reached
+            while len(self._documents) > 1 and (len(self._documents) > self.max_documents or
+                                                self.total_bytes > self.max_bytes):
+                self._remove_locked(next(iter(self._documents)))
+
+    def _load(self, document_id):
+        with self._lock:
+            return self._documents.get(document_id)
+
+    def _remove_locked(self, document_id):
+        if self._documents.pop(document_id, None) is None:
+            return False
+        self.total_bytes -= self._sizes.pop(document_id)
+        return True
+
+    def delete(self, document_id):
+        with self._lock:
+            return self._remove_locked(document_id)
+
+    def _purge_locked(self):
+        now = time.time()
+        expired = [key for key, document in self._documents.items() if document["expires"] < now]
+        for key in expired:
+            self._remove_locked(key)
+        return len(expired)
+
+    def purge(self):
+        with self._lock:
+            return self._purge_locked()
+
+
+class SQLiteDocumentStore(DocumentStore):
+    def __init__(self, path, ttl=3600, purge_interval=60):
+        super().__init__(ttl)
+        self.path = path
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id TEXT PRIMARY KEY, kind TEXT, text TEXT, metadata TEXT, created REAL, expires REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS documents_expires ON documents (expires)")
+
+    def _connect(self):
+        # A connection per call keeps the store safe across threads and forked workers
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _save(self, document):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (id, kind, text, metadata, created, expires) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (document["id"], document["kind"], document["text"], json.dumps(document["metadata"]),
+                 document["created"], document["expires"]))
+        if time.time() - self._last_purge > self.purge_interval:
+            self.purge()
+
+    def _load(self, document_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, kind, text, metadata, created, expires FROM documents WHERE id = ?",
+                (document_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "kind": row[1], "text": row[2], "metadata": json.loads(row[3] or '{}'),
+                "created": row[4], "expires": row[5]}
+
+    def delete(self, document_id):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM documents WHERE id = ?", (document_id,)).rowcount > 0
+
+    def purge(self):
+        self._last_purge = time.time()
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM documents WHERE expires < ?", (time.time(),)).rowcount
+
+
+class FileDocumentStore(DocumentStore):
+    def __init__(self, directory, ttl=3600, purge_interval=60):
+        super().__init__(ttl)
+        self.directory = directory
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, document_id):
+        # Ids are hex uuids; anything else cannot name a stored document
+        if not all(c in '0123456789abcdef' for c in document_id):
+            return None
+        return os.path.join(self.directory, f"{document_id}.json")
+
+    def _save(self, document):
+        path = self._path(document["id"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        if time.time() - self._last_purge > self.purge_interval:
+            self.purge()
+
+    def _load(self, document_id):
+        path = self._path(document_id)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def delete(self, document_id):
+        path = self._path(document_id)
+        if path is None:
+            return False
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def purge(self):
+        self._last_purge = time.time()
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                # Files are rewritten on renew, so mtime + ttl is always the expiry time
+                if os.path.getmtime(path) + self.ttl < self._last_purge:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+def create_document_store(backend='memory', ttl=3600, path=None, max_documents=1000, max_bytes=64 * 1024 * 1024):
+    """Build the configured store; path is the SQLite file or the directory for the file
+    backend, max_documents and max_bytes cap the memory backend"""
+    if backend not in BACKENDS:
+        print(f"Unknown document store '{backend}', using memory")
+        backend = 'memory'
+    if backend == 'sqlite':
+        return SQLiteDocumentStore(path or 'documents.sqlite3', ttl)
+    if backend == 'file':
+        return FileDocumentStore(path or 'documents', ttl)
+    return MemoryDocumentStore(ttl, max_documents, max_bytes)
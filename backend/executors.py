@@ -0,0 +1,99 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class ExecutorBusy(Exception):
+    """Raised when an executor's queue is full; handlers turn this into a 429"""
+
+    def __init__(self, name, retry_after=1):
+        super().__init__(f"Server busy: too many pending {name} jobs. Please retry shortly.")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def gevent_active():
+    """True when running under a gevent-patched server (e.g. gunicorn -k gevent)"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def create_thread_pool(max_workers, name='worker'):
+    """ThreadPoolExecutor backed by real OS threads, also under gevent"""
+    if gevent_active():
+        # Futures from gevent's pool can be waited on without blocking the hub
+        from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+        return GeventThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+
+class BoundedExecutor:
+    """Thread or process pool with a cap on queued + running jobs.
+
+    Submitting beyond `max_pending` raises ExecutorBusy instead of queueing,
+    so overload surfaces as a fast 429 rather than ever-growing latency.
+    """
+
+    def __init__(self, name, kind='thread', max_workers=None, max_pending=None, on_depth_change=None):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.on_depth_change = on_depth_change
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = self._create_pool()
+        return self._pool
+
+    def _create_pool(self):
+        if self.kind == 'process' and gevent_active():
+            # Process pools rely on helper threads that do not mix with monkey patching
+            print(f"Executor '{self.name}': process pools are not supported under gevent, using threads")
+            self.kind = 'thread'
+        if self.kind == 'process':
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return create_thread_pool(self.max_workers, f'{self.name}-worker')
+
+    def _change_depth(self, delta):
+        with self._lock:
+            self.pending += delta
+            depth = self.pending
+        if self.on_depth_change:
+            self.on_depth_change(self.name, depth)
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn on the pool and wait for its result, or raise ExecutorBusy if the queue is full"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise ExecutorBusy(self.name)
+            self.pending += 1
+            depth = self.pending
+        if self.on_depth_change:
+            self.on_depth_change(self.name, depth)
+
+        try:
+            pool = self._get_pool()
+            if self.kind == 'thread':
+                # Carry the request context (and its metrics labels) over to the worker thread
+                context = contextvars.copy_context()
+                future = pool.submit(context.run, fn, *args, **kwargs)
+            else:
+                future = pool.submit(fn, *args, **kwargs)
+            return future.result()
+        finally:
+            self._change_depth(-1)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,65 @@
+# Production server configuration: gunicorn -c gunicorn.conf.py main_test:app
+import gc
+import glob
+import os
+import tempfile
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('WORKER_TIMEOUT', 120))
+
+# Document ids and camera sessions must resolve on whichever worker serves the next
+# request, so several workers share SQLite stores unless the environment says otherwise
+if workers > 1:
+    os.environ.setdefault('DOCUMENT_STORE', 'sqlite')
+    os.environ.setdefault('CAMERA_SESSION_STORE', 'sqlite')
+    # Each worker writes its metrics to this directory and /metrics sums them, so a
+    # scrape sees the same totals whichever worker answers
+    os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'visionscript_metrics_{os.getpid()}'))
+
+# SERVING_MODE=async runs gevent workers: each worker keeps many connections open,
+# OpenRouter calls yield instead of blocking, and OCR/PDF/summarization work runs on
+# the bounded executors in main_test.py (429 once their queues are full)
+if os.environ.get('SERVING_MODE', 'sync').lower() == 'async':
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+else:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('WORKER_THREADS', 4))
+
+# MODEL_WARMUP=preload loads the models once in the master process so that
+# forked workers share that memory copy-on-write
+preload_app = os.environ.get('MODEL_WARMUP', 'background').lower() == 'preload'
+
+
+def pre_fork(server, worker):
+    # Keep the garbage collector from touching (and un-sharing) preloaded objects
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Runs once the worker has loaded the app, after gevent workers have monkey-patched
+    # the standard library, so main_test's imports and locks are the patched versions;
+    # warmup.start() loads the models on a real OS thread so the event loop stays free
+    from main_test import warmup
+    warmup.start()
+
+
+def clear_metrics_files():
+    """Remove the per-process metric files from METRICS_DIR (the directory itself stays)"""
+    directory = os.environ.get('METRICS_DIR')
+    if directory:
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def on_starting(server):
+    # Totals start from zero with each master, like the counters of a single process
+    clear_metrics_files()
+
+
+def on_exit(server):
+    clear_metrics_files()
@@ -0,0 +1,167 @@
+"""Pluggable CPU inference backends for EasyOCR readers.
+
+Backends:
+    torch       EasyOCR's default path (on CPU it already applies dynamic int8
+                quantization to the PyTorch models)
+    torch-fp32  PyTorch without quantization, mainly as an accuracy baseline
+    onnx        detector and recognizer exported to ONNX and run with ONNX Runtime
+    onnx-int8   as onnx, with the exported graphs dynamically quantized to int8
+
+Exported models are cached on disk (ONNX_MODEL_DIR) so the export only runs once.
+"""
+import importlib
+import inspect
+import os
+
+BACKENDS = ('torch', 'torch-fp32', 'onnx', 'onnx-int8')
+
+
+def onnx_model_dir():
+    from easyocr.config import MODULE_PATH
+    return os.environ.get('ONNX_MODEL_DIR', os.path.join(MODULE_PATH, 'onnx'))
+
+
+class OnnxDetector:
+    """Stands in for the CRAFT torch module inside easyocr.detection.test_net"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def __call__(self, x):
+        import torch
+        y, feature = self.session.run(None, {'image': x.cpu().numpy()})
+        return torch.from_numpy(y), torch.from_numpy(feature)
+
+    def eval(self):
+        return self
+
+
+class OnnxRecognizer:
+    """Stands in for the CRNN torch module inside easyocr.recognition.recognizer_predict"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def __call__(self, image, text=None):
+        import torch
+        (prediction,) = self.session.run(None, {'image': image.cpu().numpy()})
+        return torch.from_numpy(prediction)
+
+    def eval(self):
+        return self
+
+
+def _recognizer_export_module(model):
+    import torch
+
+    class RecognizerExport(torch.nn.Module):
+        """Same forward pass as EasyOCR's recognizer, with the (None, 1) adaptive pool
+        written as a mean so the width axis stays dynamic in the exported graph"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            visual_feature = self.model.FeatureExtraction(image)
+            visual_feature = visual_feature.permute(0, 3, 1, 2).mean(dim=3)
+            contextual_feature = self.model.SequenceModeling(visual_feature)
+            return self.model.Prediction(contextual_feature.contiguous())
+
+    return RecognizerExport(model).eval()
+
+
+def _export(module, dummy, path, output_names, dynamic_axes):
+    import torch
+    kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        kwargs['dynamo'] = False  # the TorchScript exporter handles dynamic_axes for these models
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(module, dummy, tmp_path, input_names=['image'], output_names=output_names,
+                          dynamic_axes=dynamic_axes, opset_version=17, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def export_detector(detector, path):
+    import torch
+    _export(detector.eval(), torch.randn(1, 3, 320, 320), path, ['y', 'feature'], {
+        'image': {0: 'batch', 2: 'height', 3: 'width'},
+        'y': {0: 'batch', 1: 'out_height', 2: 'out_width'},
+        'feature': {0: 'batch', 2: 'feature_height', 3: 'feature_width'}
+    })
+
+
+def export_recognizer(recognizer, path, image_height=64):
+    import torch
+    _export(_recognizer_export_module(recognizer), torch.randn(1, 1, image_height, 256), path, ['prediction'], {
+        'image': {0: 'batch', 3: 'width'},
+        'prediction': {0: 'batch', 1: 'steps'}
+    })
+
+
+def quantize_model(fp32_path, int8_path):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+    quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, int8_path)
+
+
+def create_session(path, threads=0):
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+    return ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+
+def _model_paths(reader, backend):
+    model_dir = onnx_model_dir()
+    os.makedirs(model_dir, exist_ok=True)
+    names = {'detector': f"detector_{reader.detect_network}", 'recognizer': f"recognizer_{reader.model_lang}"}
+    fp32 = {role: os.path.join(model_dir, f"{name}.onnx") for role, name in names.items()}
+    if backend == 'onnx-int8':
+        return fp32, {role: os.path.join(model_dir, f"{name}.int8.onnx") for role, name in names.items()}
+    return fp32, fp32
+
+
+def apply_onnx_backend(reader, backend='onnx', threads=0):
+    """Swap a (non-quantized, CPU) reader's torch models for ONNX Runtime sessions"""
+    fp32_paths, paths = _model_paths(reader, backend)
+
+    if not os.path.exists(fp32_paths['detector']):
+        export_detector(reader.detector, fp32_paths['detector'])
+    if not os.path.exists(fp32_paths['recognizer']):
+        image_height = getattr(importlib.import_module('easyocr.easyocr'), 'imgH', 64)
+        export_recognizer(reader.recognizer, fp32_paths['recognizer'], image_height)
+    for role in ('detector', 'recognizer'):
+        if not os.path.exists(paths[role]):
+            quantize_model(fp32_paths[role], paths[role])
+
+    reader.detector = OnnxDetector(create_session(paths['detector'], threads))
+    reader.recognizer = OnnxRecognizer(create_session(paths['recognizer'], threads))
+    reader.inference_backend = backend
+    return reader
+
+
+def build_reader(languages, backend='torch', threads=0):
+    """Create an EasyOCR reader for the `languages` list running on the requested backend"""
+    import easyocr
+
+    if backend not in BACKENDS:
+        print(f"Unknown OCR inference backend '{backend}', using torch")
+        backend = 'torch'
+
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    if backend == 'torch':
+        return easyocr.Reader(languages)
+
+    reader = easyocr.Reader(languages, gpu=False, quantize=False)
+    if backend == 'torch-fp32':
+        return reader
+    return apply_onnx_backend(reader, backend, threads)
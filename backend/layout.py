@@ -0,0 +1,195 @@
+"""Layout analysis for OCR results.
+
+LayoutResult keeps the detections of a page as parallel NumPy arrays (boxes,
+confidences, line, block and column ids) stored in reading order, instead of
+one dict per detection. Lines are found by clustering box centres vertically
+and columns by sweeping each block's horizontal projection for gutters; both
+only sort and compare neighbours, so a page of n detections costs O(n log n).
+
+Blocks are runs of lines without a large vertical gap. A block whose lines hold
+several detections split by gutters is either a table (short cells, read row
+by row) or multi-column text (long lines, read column by column).
+"""
+import numpy as np
+
+LAYOUT_VERSION = 1
+BLOCK_TYPES = ('text', 'columns', 'table')
+TEXT, COLUMNS, TABLE = range(3)
+
+
+def quad_boxes(quads):
+    """Axis-aligned (x0, y0, x1, y1) int32 boxes from readtext corner points, shape (n, 4)"""
+    points = np.asarray(quads, dtype=np.float32).reshape(-1, 4, 2)
+    return np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1).round().astype(np.int32)
+
+
+def _ids_from_breaks(order, breaks):
+    """Turn a boolean 'starts a new group' flag per sorted item into group ids in original order"""
+    ids = np.empty(len(order), dtype=np.int32)
+    ids[order] = np.cumsum(breaks) - 1
+    return ids
+
+
+def cluster_lines(boxes, tolerance=0.5):
+    """Line id per box, numbered top to bottom.
+
+    Boxes sorted by vertical centre start a new line wherever the centre jumps
+    by more than `tolerance` times the median box height.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int32)
+    centres = (boxes[:, 1] + boxes[:, 3]) / 2
+    height = np.median(np.maximum(boxes[:, 3] - boxes[:, 1], 1))
+    order = np.argsort(centres, kind='stable')
+    breaks = np.concatenate([[True], np.diff(centres[order]) > tolerance * height])
+    return _ids_from_breaks(order, breaks)
+
+
+def cluster_columns(boxes, min_gap=0):
+    """Column id per box, numbered left to right.
+
+    In left-edge order a new column starts wherever a box begins more than
+    `min_gap` pixels right of every box before it, i.e. at each vertical gutter.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int32)
+    order = np.argsort(boxes[:, 0], kind='stable')
+    right_edge = np.maximum.accumulate(boxes[order, 2])
+    breaks = np.concatenate([[True], boxes[order[1:], 0] > right_edge[:-1] + min_gap])
+    return _ids_from_breaks(order, breaks)
+
+
+class LayoutResult:
+    """Detections of one page in reading order, as parallel arrays"""
+
+    def __init__(self, texts, boxes, confidences, line_ids, block_ids, column_ids, block_types, size=None):
+        self.texts = list(texts)
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.confidences = np.asarray(confidences, dtype=np.float32)
+        self.line_ids = np.asarray(line_ids, dtype=np.int32)
+        self.block_ids = np.asarray(block_ids, dtype=np.int32)
+        self.column_ids = np.asarray(column_ids, dtype=np.int32)
+        self.block_types = np.asarray(block_types, dtype=np.uint8)  # one per block, index into BLOCK_TYPES
+        if size is None:
+            size = (int(self.boxes[:, 2].max()), int(self.boxes[:, 3].max())) if len(self.boxes) else (0, 0)
+        self.size = tuple(int(v) for v in size)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def text(self):
+        """Text in reading order: words on a line joined by spaces, table cells by tabs,
+        lines by newlines and blocks by blank lines"""
+        if not self.texts:
+            return ''
+        same_block = self.block_ids[1:] == self.block_ids[:-1]
+        same_line = same_block & (self.line_ids[1:] == self.line_ids[:-1])
+        same_cell = same_line & (self.column_ids[1:] == self.column_ids[:-1])
+        in_table = self.block_types[self.block_ids[1:]] == TABLE
+        separators = np.select([~same_block, same_cell, same_line & in_table], ['\n\n', ' ', '\t'], '\n')
+        parts = [self.texts[0]]
+        for separator, text in zip(separators.tolist(), self.texts[1:]):
+            parts.append(separator)
+            parts.append(text)
+        return ''.join(parts)
+
+    def detections(self):
+        """Per-detection dicts in the camera feed's format"""
+        return [{
+            "text": text,
+            "bbox": {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0},
+            "status": "success"
+        } for text, (x0, y0, x1, y1) in zip(self.texts, self.boxes.tolist())]
+
+    def tables(self):
+        """Cell grids of the table blocks: [{"block", "rows", "columns", "cells"}]"""
+        tables = []
+        for block in np.flatnonzero(self.block_types == TABLE).tolist():
+            members = np.flatnonzero(self.block_ids == block)
+            # Blocks are runs of consecutive lines, so rows are the line ids offset to zero
+            rows = self.line_ids[members] - self.line_ids[members].min()
+            columns = self.column_ids[members]
+            cells = [[''] * (int(columns.max()) + 1) for _ in range(int(rows.max()) + 1)]
+            for index, row, column in zip(members.tolist(), rows.tolist(), columns.tolist()):
+                cells[row][column] = f"{cells[row][column]} {self.texts[index]}".strip()
+            tables.append({"block": block, "rows": len(cells), "columns": len(cells[0]), "cells": cells})
+        return tables
+
+    def to_dict(self):
+        """Compact JSON form: one flat list per field instead of one object per detection"""
+        return {
+            "version": LAYOUT_VERSION,
+            "size": list(self.size),
+            "text": self.texts,
+            "boxes": self.boxes.reshape(-1).tolist(),
+            "confidence": np.round(self.confidences.astype(np.float64), 3).tolist(),
+            "line": self.line_ids.tolist(),
+            "block": self.block_ids.tolist(),
+            "column": self.column_ids.tolist(),
+            "block_types": [BLOCK_TYPES[t] for t in self.block_types.tolist()]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != LAYOUT_VERSION:
+            raise ValueError(f"Unsupported layout version: {data.get('version')}")
+        return cls(data["text"], data["boxes"], data["confidence"], data["line"], data["block"], data["column"],
+                   [BLOCK_TYPES.index(t) for t in data["block_types"]], data["size"])
+
+
+def analyze_layout(results, size=None, line_tolerance=0.5, block_gap=1.2, prose_chars=25):
+    """Build a LayoutResult from readtext-style (box, text, confidence) results.
+
+    Lines more than `block_gap` median heights apart start a new block. A block
+    with gutters whose cells average at least `prose_chars` characters is
+    multi-column text; shorter cells make it a table.
+    """
+    results = [result for result in results if str(result[1]).strip()]
+    if not results:
+        return LayoutResult([], np.zeros((0, 4)), [], [], [], [], [], size)
+    texts = [str(text).strip() for _, text, _ in results]
+    boxes = quad_boxes([box for box, _, _ in results])
+    confidences = np.array([confidence for _, _, confidence in results], dtype=np.float32)
+    lengths = np.array([len(text) for text in texts])
+
+    line_ids = cluster_lines(boxes, line_tolerance)
+    line_count = int(line_ids.max()) + 1
+    line_top = np.full(line_count, np.iinfo(np.int32).max)
+    line_bottom = np.zeros(line_count, dtype=np.int64)
+    np.minimum.at(line_top, line_ids, boxes[:, 1])
+    np.maximum.at(line_bottom, line_ids, boxes[:, 3])
+    multi = np.bincount(line_ids, minlength=line_count) > 1
+    height = np.median(np.maximum(boxes[:, 3] - boxes[:, 1], 1))
+
+    # Segments: lines split at large gaps and wherever lines go from one detection to several
+    gap_break = np.concatenate([[True], line_top[1:] - line_bottom[:-1] > block_gap * height])
+    segment_of_line = np.cumsum(gap_break | np.concatenate([[True], multi[1:] != multi[:-1]])) - 1
+    segment_ids = segment_of_line[line_ids]
+
+    column_ids = np.zeros(len(texts), dtype=np.int32)
+    segment_types = np.full(int(segment_of_line[-1]) + 1, TEXT, dtype=np.uint8)
+    segments, line_counts = np.unique(segment_of_line[multi], return_counts=True)
+    for segment in segments[line_counts > 1].tolist():
+        members = np.flatnonzero(segment_ids == segment)
+        columns = cluster_columns(boxes[members])
+        if columns.max() == 0:
+            continue
+        column_ids[members] = columns
+        segment_types[segment] = COLUMNS if lengths[members].mean() >= prose_chars else TABLE
+
+    # Neighbouring plain-text segments are one block unless a gap separates them
+    is_text = segment_types == TEXT
+    segment_starts = np.flatnonzero(np.concatenate([[True], segment_of_line[1:] != segment_of_line[:-1]]))
+    merge_break = gap_break[segment_starts] | ~is_text | np.concatenate([[True], ~is_text[:-1]])
+    block_of_segment = np.cumsum(merge_break) - 1
+    block_ids = block_of_segment[segment_ids]
+    block_types = segment_types[merge_break]
+
+    # Reading order: blocks top to bottom; columns before lines in multi-column text, lines first otherwise
+    in_columns = block_types[block_ids] == COLUMNS
+    order = np.lexsort((boxes[:, 0], np.where(in_columns, line_ids, column_ids),
+                        np.where(in_columns, column_ids, line_ids), block_ids))
+    if size is None:
+        size = (int(boxes[:, 2].max()), int(boxes[:, 3].max()))
+    return LayoutResult([texts[i] for i in order.tolist()], boxes[order], confidences[order], line_ids[order],
+                        block_ids[order], column_ids[order], block_types, size)
@@ -0,0 +1,423 @@
+"""Load generator for a running VisionScript backend.
+
+Replays traffic mixes against /camera_feed, /upload_image, /extract_pdf_text
+and /summarize_text with virtual users, optionally ramping the load in steps
+to find the saturation point, and reports p50/p99 latency, throughput and
+error rates per endpoint. A local OpenRouter stub with configurable latency
+and 429 behaviour stands in for the real API.
+
+Usage:
+    # Against an instance started with OPENROUTER_API_URL pointing at the stub
+    python loadtest.py --stub --stub-port 8099 --profile mixed --duration 60
+    # Start the server too (gunicorn, wired to the stub) and ramp the load
+    python loadtest.py --start-server --stub --profile camera --ramp 1,2,4,8 --output load.json
+"""
+import argparse
+import base64
+import io
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+from PIL import ImageDraw
+
+from benchmark import (SAMPLE_TEXT, find_fonts, load_font, render_document, generate_text, generate_pdf,
+                       start_openrouter_stub, percentile, git_revision)
+
+# Virtual users per scenario for each named profile
+PROFILES = {
+    'camera': {'camera': 8},
+    'bulk': {'upload': 8},
+    'pdf-flood': {'pdf': 8},
+    'summarize-burst': {'summarize': 16},
+    'mixed': {'camera': 4, 'upload': 2, 'pdf': 1, 'summarize': 4},
+}
+
+
+class Payloads:
+    """Synthetic request bodies.
+
+    With unique=True every image is encoded per request with a new crop offset
+    and a stamped request number, so the server's near-duplicate cache cannot
+    answer it; otherwise the same few images are sent again and again.
+    """
+
+    def __init__(self, seed, pdf_pages, text_words, model, unique=True):
+        font = find_fonts(1)[0]
+        page = render_document(SAMPLE_TEXT['en'], font, 24, 15, seed, lines=24)
+        self.model = model
+        self.unique = unique
+        self.page = page
+        self.stamp_font = load_font(font, 48)
+        self.frame_font = load_font(font, 20)
+        self.counter = itertools.count()
+
+        buffer = io.BytesIO()
+        page.save(buffer, format='PNG')
+        self.page_png = buffer.getvalue()
+
+        # Camera frames: 640x480 crops at shifting offsets, like a hand-held phone
+        rng = random.Random(seed)
+        self.frames = []
+        for _ in range(8):
+            x = rng.randint(0, max(0, page.width - 640))
+            y = rng.randint(0, max(0, page.height - 480))
+            buffer = io.BytesIO()
+            page.crop((x, y, x + 640, y + 480)).save(buffer, format='JPEG', quality=80)
+            self.frames.append(base64.b64encode(buffer.getvalue()).decode())
+
+        self.pdf = generate_pdf(pdf_pages, seed)
+        self.texts = [generate_text(text_words, seed + i) for i in range(4)]
+
+    def _stamp(self, image, font, position):
+        draw = ImageDraw.Draw(image)
+        text = f"Request {next(self.counter)}"
+        left, top, right, bottom = draw.textbbox(position, text, font=font)
+        draw.rectangle((left - 4, top - 4, right + 4, bottom + 4), fill='white')
+        draw.text(position, text, fill='black', font=font)
+
+    def frame(self, rng):
+        """Base64 JPEG camera frame"""
+        if not self.unique:
+            return rng.choice(self.frames)
+        x = rng.randint(0, max(0, self.page.width - 640))
+        y = rng.randint(0, max(0, self.page.height - 480))
+        frame = self.page.crop((x, y, x + 640, y + 480))
+        self._stamp(frame, self.frame_font, (8, 8))
+        buffer = io.BytesIO()
+        frame.save(buffer, format='JPEG', quality=80)
+        return base64.b64encode(buffer.getvalue()).decode()
+
+    def upload(self):
+        """PNG bytes of a full page"""
+        if not self.unique:
+            return self.page_png
+        page = self.page.copy()
+        self._stamp(page, self.stamp_font, (40, 8))
+        buffer = io.BytesIO()
+        page.save(buffer, format='PNG', compress_level=1)
+        return buffer.getvalue()
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = []
+        self.lock = threading.Lock()
+
+    def record(self, step, endpoint, seconds, status, peak_rss_mb=None):
+        with self.lock:
+            self.samples.append((step, endpoint, seconds, status, peak_rss_mb))
+
+
+def timed_request(session, recorder, step, endpoint, method, url, **kwargs):
+    """Send one request and record its latency; returns the response or None on a connection error"""
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=kwargs.pop('timeout', 120), **kwargs)
+    except requests.RequestException:
+        recorder.record(step, endpoint, time.perf_counter() - start, 'connection_error')
+        return None
+    peak = response.headers.get('X-Peak-RSS-MB')
+    recorder.record(step, endpoint, time.perf_counter() - start, response.status_code,
+                    float(peak) if peak else None)
+    return response
+
+
+def camera_user(base_url, payloads, recorder, step, deadline, args, rng):
+    """One camera session sending frames at args.fps; late frames are skipped, not bunched"""
+    session = requests.Session()
+    session_id = None
+    response = timed_request(session, recorder, step, 'camera_sessions', 'POST', f"{base_url}/camera_sessions")
+    if response is not None and response.ok:
+        session_id = response.json().get('session_id')
+
+    interval = 1.0 / args.fps
+    next_frame = time.perf_counter()
+    while time.perf_counter() < deadline:
+        body = {'image': payloads.frame(rng), 'model': payloads.model, 'language': 'en'}
+        if session_id:
+            body['session_id'] = session_id
+        timed_request(session, recorder, step, 'camera_feed', 'POST', f"{base_url}/camera_feed", json=body)
+        next_frame += interval
+        now = time.perf_counter()
+        if next_frame > now:
+            time.sleep(min(next_frame - now, max(0.0, deadline - now)))
+        else:
+            next_frame = now
+
+    if session_id:
+        timed_request(session, recorder, step, 'camera_session_summary', 'GET',
+                      f"{base_url}/camera_sessions/{session_id}/summary")
+        session.delete(f"{base_url}/camera_sessions/{session_id}", timeout=10)
+
+
+def upload_user(base_url, payloads, recorder, step, deadline, args, rng):
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        timed_request(session, recorder, step, 'upload_image', 'POST', f"{base_url}/upload_image",
+                      files={'image': ('page.png', payloads.upload(), 'image/png')},
+                      data={'model': payloads.model, 'language': 'en'})
+        time.sleep(args.think_time)
+
+
+def pdf_user(base_url, payloads, recorder, step, deadline, args, rng):
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        timed_request(session, recorder, step, 'extract_pdf_text', 'POST', f"{base_url}/extract_pdf_text",
+                      files={'pdf_file': ('document.pdf', payloads.pdf, 'application/pdf')})
+        time.sleep(args.think_time)
+
+
+def summarize_user(base_url, payloads, recorder, step, deadline, args, rng):
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        smart_option = 'openrouter' if rng.random() < args.openrouter_share else 'local_smart'
+        endpoint = f"summarize_text[{smart_option}]"
+        timed_request(session, recorder, step, endpoint, 'POST', f"{base_url}/summarize_text",
+                      json={'text': rng.choice(payloads.texts), 'smart_option': smart_option,
+                            'type': rng.choice(['paragraph', 'bullets']), 'length': 'medium'})
+        time.sleep(args.think_time)
+
+
+SCENARIOS = {
+    'camera': camera_user,
+    'upload': upload_user,
+    'pdf': pdf_user,
+    'summarize': summarize_user,
+}
+
+
+def parse_mix(text):
+    """Parse 'camera=2,upload=1' into {'camera': 2, 'upload': 1}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, count = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = int(count or 1)
+    return mix
+
+
+def run_step(base_url, payloads, recorder, step, mix, multiplier, duration, args):
+    deadline = time.perf_counter() + duration
+    threads = []
+    for scenario, users in mix.items():
+        for user in range(users * multiplier):
+            rng = random.Random(args.seed + step * 1000 + len(threads))
+            thread = threading.Thread(target=SCENARIOS[scenario],
+                                      args=(base_url, payloads, recorder, step, deadline, args, rng),
+                                      name=f"{scenario}-{user}", daemon=True)
+            threads.append(thread)
+    for thread in threads:
+        thread.start()
+        time.sleep(args.spawn_interval)
+    for thread in threads:
+        thread.join()
+
+
+def summarize_step(samples, duration):
+    by_endpoint = defaultdict(list)
+    for _, endpoint, seconds, status, peak in samples:
+        by_endpoint[endpoint].append((seconds, status, peak))
+
+    report = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = [seconds for seconds, _, _ in rows]
+        statuses = defaultdict(int)
+        for _, status, _ in rows:
+            statuses[str(status)] += 1
+        ok = sum(count for status, count in statuses.items() if status.isdigit() and 200 <= int(status) < 300)
+        peaks = [peak for _, _, peak in rows if peak is not None]
+        report[endpoint] = {
+            'requests': len(rows),
+            'throughput_rps': round(ok / duration, 3),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'error_rate': round(1 - ok / len(rows), 4),
+            'rate_limited': statuses.get('429', 0),
+            'statuses': dict(statuses),
+            'peak_rss_mb': max(peaks) if peaks else None
+        }
+    return report
+
+
+def find_saturation(steps, slo_p99_ms, max_error_rate):
+    """Per endpoint, the first load step that breaks the SLO or stops adding throughput"""
+    saturation = {}
+    previous = {}
+    for step in steps:
+        for endpoint, stats in step['endpoints'].items():
+            if endpoint in saturation:
+                continue
+            reason = None
+            if stats['p99_ms'] > slo_p99_ms:
+                reason = f"p99 {stats['p99_ms']} ms > {slo_p99_ms} ms"
+            elif stats['error_rate'] > max_error_rate:
+                reason = f"error rate {stats['error_rate']:.1%} > {max_error_rate:.1%}"
+            elif endpoint in previous and stats['throughput_rps'] < previous[endpoint] * 1.05:
+                reason = "throughput stopped growing"
+            if reason:
+                saturation[endpoint] = {'multiplier': step['multiplier'], 'users': step['users'], 'reason': reason}
+            previous[endpoint] = stats['throughput_rps']
+    return saturation
+
+
+def dedup_image_hits(base_url):
+    """Images the server answered from its near-duplicate cache so far, per its /metrics; None if unavailable"""
+    try:
+        response = requests.get(f"{base_url}/metrics", timeout=10)
+    except requests.RequestException:
+        return None
+    if not response.ok:
+        return None
+    hits = 0.0
+    for line in response.text.splitlines():
+        if line.startswith('visionscript_dedup_hits_total{') and 'kind="image"' in line:
+            hits += float(line.rsplit(' ', 1)[1])
+    return hits
+
+
+def start_server(args, stub_url):
+    env = dict(os.environ, PORT=str(args.server_port))
+    if stub_url:
+        env['OPENROUTER_API_URL'] = stub_url
+        env.setdefault('OPENROUTER_API_KEY', 'loadtest-stub-key')
+    command = args.server_command or f"gunicorn -c gunicorn.conf.py -b 127.0.0.1:{args.server_port} main_test:app"
+    process = subprocess.Popen(command.split(), cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    base_url = f"http://127.0.0.1:{args.server_port}"
+    deadline = time.time() + args.server_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/readyz", timeout=2).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    process.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+
+def print_report(steps, saturation, payload_mode):
+    print(f"\nPayloads: {payload_mode}")
+    for step in steps:
+        print(f"\nStep x{step['multiplier']} ({step['users']} users, {step['duration']}s)")
+        if step['dedup_image_hits']:
+            print(f"  warning: {step['dedup_image_hits']:.0f} images were answered from the server's "
+                  f"near-duplicate cache, so OCR latency is understated")
+        print(f"  {'endpoint':34} {'reqs':>6} {'rps':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'429s':>5}")
+        for endpoint, stats in step['endpoints'].items():
+            print(f"  {endpoint:34} {stats['requests']:>6} {stats['throughput_rps']:>8.2f} {stats['p50_ms']:>9.1f} "
+                  f"{stats['p99_ms']:>9.1f} {stats['error_rate']:>7.1%} {stats['rate_limited']:>5}")
+    if saturation:
+        print("\nSaturation")
+        for endpoint, info in saturation.items():
+            print(f"  {endpoint}: x{info['multiplier']} ({info['users']} users) - {info['reason']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running VisionScript backend")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="base URL of the backend")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='mixed')
+    parser.add_argument('--mix', type=parse_mix, help="virtual users per scenario, e.g. camera=4,summarize=2 "
+                                                      "(overrides --profile)")
+    parser.add_argument('--duration', type=float, default=30, help="seconds per load step")
+    parser.add_argument('--ramp', default='1', help="comma-separated user multipliers, one load step each")
+    parser.add_argument('--fps', type=float, default=2.0, help="frames per second per camera session")
+    parser.add_argument('--think-time', type=float, default=0.0, help="pause between requests of one user")
+    parser.add_argument('--spawn-interval', type=float, default=0.05, help="delay between starting users")
+    parser.add_argument('--model', default='easyocr', help="OCR model for camera and upload traffic")
+    parser.add_argument('--payloads', choices=['unique', 'fixed'], default='unique',
+                        help="unique encodes every image per request so the server's near-duplicate cache "
+                             "cannot answer it; fixed resends the same images")
+    parser.add_argument('--pdf-pages', type=int, default=10)
+    parser.add_argument('--text-words', type=int, default=2000)
+    parser.add_argument('--openrouter-share', type=float, default=0.25,
+                        help="fraction of summarize requests that use OpenRouter")
+    parser.add_argument('--slo-p99-ms', type=float, default=2000)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="write the report as JSON")
+    parser.add_argument('--stub', action='store_true', help="run the local OpenRouter stub")
+    parser.add_argument('--stub-port', type=int, default=8099)
+    parser.add_argument('--stub-latency', type=float, default=1.0, help="seconds before the stub answers")
+    parser.add_argument('--stub-jitter', type=float, default=0.3)
+    parser.add_argument('--stub-429-rate', type=float, default=0.0, help="probability of a 429 per request")
+    parser.add_argument('--stub-rpm', type=int, default=0, help="answer 429 above this many requests per minute")
+    parser.add_argument('--start-server', action='store_true', help="start the backend with gunicorn first")
+    parser.add_argument('--server-command', help="command to start the backend instead of gunicorn")
+    parser.add_argument('--server-port', type=int, default=5055)
+    parser.add_argument('--server-timeout', type=float, default=300, help="seconds to wait for /readyz")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    mix = args.mix or PROFILES[args.profile]
+    multipliers = [int(m) for m in args.ramp.split(',')]
+
+    stub = None
+    if args.stub:
+        stub = start_openrouter_stub(args.stub_latency, args.stub_jitter, args.stub_429_rate, args.stub_rpm,
+                                     port=args.stub_port)
+        print(f"OpenRouter stub listening at {stub.api_url}")
+
+    server = None
+    base_url = args.url.rstrip('/')
+    if args.start_server:
+        server, base_url = start_server(args, stub.api_url if stub else None)
+
+    try:
+        print("Generating payloads")
+        payloads = Payloads(args.seed, args.pdf_pages, args.text_words, args.model, args.payloads == 'unique')
+        recorder = Recorder()
+        steps = []
+        for step, multiplier in enumerate(multipliers):
+            users = sum(mix.values()) * multiplier
+            print(f"Step {step + 1}/{len(multipliers)}: {users} users for {args.duration}s")
+            hits_before = dedup_image_hits(base_url)
+            run_step(base_url, payloads, recorder, step, mix, multiplier, args.duration, args)
+            hits_after = dedup_image_hits(base_url)
+            samples = [sample for sample in recorder.samples if sample[0] == step]
+            steps.append({'multiplier': multiplier, 'users': users, 'duration': args.duration,
+                          'endpoints': summarize_step(samples, args.duration),
+                          'dedup_image_hits': hits_after - hits_before
+                          if hits_before is not None and hits_after is not None else None})
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if stub is not None:
+            stub.shutdown()
+
+    saturation = find_saturation(steps, args.slo_p99_ms, args.max_error_rate) if len(steps) > 1 else {}
+    print_report(steps, saturation, args.payloads)
+
+    if args.output:
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'url': base_url,
+            'mix': mix,
+            'fps': args.fps,
+            'payloads': args.payloads,
+            'stub': {'latency': args.stub_latency, 'jitter': args.stub_jitter, '429_rate': args.stub_429_rate,
+                     'rpm': args.stub_rpm} if args.stub else None,
+            'steps': steps,
+            'saturation': saturation
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
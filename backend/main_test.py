@@ -1,8 +1,6 @@
-import cv2
-import easyocr
-import pytesseract
 import numpy as np
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, g, Response, has_request_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
 import tempfile
 import os
@@ -10,34 +8,266 @@ import base64
 import xlsxwriter
 from PIL import Image, ImageEnhance
 import re
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
-from sumy.summarizers.luhn import LuhnSummarizer
-from sumy.summarizers.text_rank import TextRankSummarizer
-import nltk
-from collections import Counter
+from collections import Counter, defaultdict
 import math
-import PyPDF2
 import io
 import requests
 import json
+import gzip
+import hashlib
+import time
+import threading
+import contextvars
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from metrics import registry as metrics_registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from startup import lazy_import, Warmup
+from executors import BoundedExecutor, ExecutorBusy, create_thread_pool
+from inference_backend import build_reader
+from tiling import ocr_tiled
+from documents import create_document_store
+from search_index import SearchIndex
+from dedupe import PerceptualCache, ImageFingerprint, dedupe_sentences, find_near_duplicates
+from running_summary import RunningSummary, create_session_store
+from layout import LayoutResult, analyze_layout
+from uploads import (UploadTooLarge, PeakMemoryTracker, make_request_class, spool_upload, remove_quietly,
+                     mapped_file, check_image_dimensions)
+
+# Heavy dependencies are imported on first use to keep startup fast
+cv2 = lazy_import('cv2')
+pytesseract = lazy_import('pytesseract')
+nltk = lazy_import('nltk')
+PyPDF2 = lazy_import('PyPDF2')
 
 # Load environment variables from .env file
 load_dotenv()
 
 
 
+# Upload limits: request bodies over MAX_UPLOAD_MB are rejected with 413, file parts
+# over UPLOAD_SPOOL_KB are spooled to UPLOAD_SPOOL_DIR instead of RAM, camera frames
+# are capped at MAX_CAMERA_FRAME_MB and images over MAX_IMAGE_PIXELS are refused
+# before decoding
+MAX_UPLOAD_BYTES = int(float(os.environ.get('MAX_UPLOAD_MB', 50)) * 1024 * 1024)
+MAX_CAMERA_FRAME_BYTES = int(float(os.environ.get('MAX_CAMERA_FRAME_MB', 8)) * 1024 * 1024)
+MAX_FORM_MEMORY_BYTES = int(float(os.environ.get('MAX_FORM_MEMORY_MB', 16)) * 1024 * 1024)
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 150_000_000))
+UPLOAD_SPOOL_BYTES = int(os.environ.get('UPLOAD_SPOOL_KB', 512)) * 1024
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or None
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
 app = Flask(__name__)
+app.request_class = make_request_class(UPLOAD_SPOOL_BYTES, UPLOAD_SPOOL_DIR, MAX_FORM_MEMORY_BYTES)
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 CORS(app)
 
+# Instrumentation (exposed at /metrics). With several worker processes, METRICS_DIR is a
+# directory they share so that /metrics on any worker reports the totals of all of them.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+if METRICS_DIR:
+    metrics_registry.enable_multiprocess(METRICS_DIR, float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0)))
+STAGE_SECONDS = metrics_registry.histogram(
+    'visionscript_stage_seconds', 'Time spent in each processing stage',
+    ['stage', 'endpoint', 'model', 'language'])
+STAGE_ERRORS = metrics_registry.counter(
+    'visionscript_stage_errors_total', 'Failures per processing stage', ['stage', 'endpoint'])
+REQUEST_SECONDS = metrics_registry.histogram(
+    'visionscript_request_seconds', 'Total request handling time', ['endpoint', 'status'])
+INFLIGHT_REQUESTS = metrics_registry.gauge(
+    'visionscript_inflight_requests', 'Requests currently being handled', ['endpoint'])
+READER_LOADS = metrics_registry.counter(
+    'visionscript_reader_loads_total', 'EasyOCR reader load events', ['language'])
+READER_LOAD_SECONDS = metrics_registry.histogram(
+    'visionscript_reader_load_seconds', 'Time spent loading EasyOCR readers', ['language'])
+REQUEST_PEAK_RSS = metrics_registry.histogram(
+    'visionscript_request_peak_rss_bytes', 'Worker peak resident memory while handling a request', ['endpoint'],
+    buckets=[2 ** n * 1024 * 1024 for n in range(5, 15)])
+
+# Peak memory per request, reported in the X-Peak-RSS-MB header (MEMORY_TRACKING=off disables it)
+MEMORY_TRACKING = os.environ.get('MEMORY_TRACKING', 'on').lower() != 'off'
+memory_tracker = PeakMemoryTracker()
+
+def current_endpoint():
+    """Name of the Flask endpoint being served, used as a metrics label"""
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'none'
+
+def time_stage(stage, model='', language=''):
+    """Context manager recording the duration of a processing stage"""
+    return STAGE_SECONDS.time(stage=stage, endpoint=current_endpoint(), model=model, language=language)
+
+def record_error(stage):
+    STAGE_ERRORS.inc(stage=stage, endpoint=current_endpoint())
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.request_endpoint = current_endpoint()
+    INFLIGHT_REQUESTS.inc(endpoint=g.request_endpoint)
+    if MEMORY_TRACKING:
+        memory_tracker.start()
+        g.memory_tracked = True
+
+# JSON/text responses at least GZIP_MIN_SIZE bytes are gzipped for clients that accept it
+GZIP_MIN_SIZE = int(os.environ.get('GZIP_MIN_SIZE', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 5))
+
+def compress_response(response):
+    """Gzip a buffered response in place if the client accepts it and it is worth it"""
+    if (response.direct_passthrough or response.status_code < 200 or response.status_code >= 300 or
+            'Content-Encoding' in response.headers or
+            'gzip' not in request.headers.get('Accept-Encoding', '').lower() or
+            not (response.mimetype == 'application/json' or response.mimetype.startswith('text/'))):
+        return response
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Content-Length'] = str(len(response.get_data()))
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.after_request
+def record_request_time(response):
+    response = compress_response(response)
+    if 'request_start' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start,
+                                endpoint=g.request_endpoint, status=response.status_code)
+    if g.pop('memory_tracked', False):
+        peak = memory_tracker.stop()
+        if peak is not None:
+            REQUEST_PEAK_RSS.observe(peak, endpoint=g.request_endpoint)
+            response.headers['X-Peak-RSS-MB'] = f"{peak / (1024 * 1024):.1f}"
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    if 'request_endpoint' in g:
+        INFLIGHT_REQUESTS.dec(endpoint=g.request_endpoint)
+    if g.pop('memory_tracked', False):
+        memory_tracker.stop()
+
+@app.errorhandler(RequestEntityTooLarge)
+@app.errorhandler(UploadTooLarge)
+def upload_too_large(e):
+    message = str(e) if isinstance(e, UploadTooLarge) else f"Upload exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"
+    return jsonify({"error": message, "status": "error"}), 413
+
+# Bounded executors for CPU-heavy work. Each can be tuned with <NAME>_EXECUTOR
+# (thread or process), <NAME>_WORKERS and <NAME>_QUEUE environment variables.
+EXECUTOR_QUEUE_DEPTH = metrics_registry.gauge(
+    'visionscript_executor_queue_depth', 'Jobs queued or running per executor', ['executor'])
+EXECUTOR_REJECTIONS = metrics_registry.counter(
+    'visionscript_executor_rejections_total', 'Jobs rejected because an executor queue was full', ['executor'])
+
+def make_executor(name, default_kind='thread'):
+    prefix = name.upper()
+    return BoundedExecutor(
+        name,
+        kind=os.environ.get(f'{prefix}_EXECUTOR', default_kind).lower(),
+        max_workers=int(os.environ.get(f'{prefix}_WORKERS', 0)) or None,
+        max_pending=int(os.environ.get(f'{prefix}_QUEUE', 0)) or None,
+        on_depth_change=lambda executor, depth: EXECUTOR_QUEUE_DEPTH.set(depth, executor=executor)
+    )
+
+ocr_executor = make_executor('ocr')
+pdf_executor = make_executor('pdf')
+summarize_executor = make_executor('summarize')
+
+@app.errorhandler(ExecutorBusy)
+def executor_busy(e):
+    EXECUTOR_REJECTIONS.inc(executor=e.name)
+    response = jsonify({"error": str(e), "status": "error"})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
+
+# Server-side documents: extraction results and summaries are stored for DOCUMENT_TTL
+# seconds and referenced by id. Use DOCUMENT_STORE=sqlite or file when running
+# several workers so an id issued by one worker resolves on the others.
+DOCUMENT_STORE = os.environ.get('DOCUMENT_STORE', 'memory').lower()
+DOCUMENT_TTL = int(os.environ.get('DOCUMENT_TTL', 3600))
+DOCUMENT_STORE_PATH = os.environ.get('DOCUMENT_STORE_PATH') or os.path.join(
+    tempfile.gettempdir(), 'visionscript_documents.sqlite3' if DOCUMENT_STORE == 'sqlite' else 'visionscript_documents')
+# The memory store is capped by document count and by total text size
+DOCUMENT_STORE_MAX = int(os.environ.get('DOCUMENT_STORE_MAX', 1000))
+DOCUMENT_STORE_MAX_BYTES = int(os.environ.get('DOCUMENT_STORE_MAX_BYTES', 64 * 1024 * 1024))
+document_store = create_document_store(DOCUMENT_STORE, DOCUMENT_TTL, DOCUMENT_STORE_PATH, DOCUMENT_STORE_MAX,
+                                       DOCUMENT_STORE_MAX_BYTES)
+
+def store_document(text, kind, **metadata):
+    """Save text in the document store; returns None instead of failing the request"""
+    try:
+        with time_stage('document_store', kind):
+            return document_store.put(text, kind, metadata)
+    except Exception as e:
+        print(f"Error storing document: {e}")
+        record_error('document_store')
+        return None
+
+def renew_document(document_id):
+    try:
+        return document_store.renew(document_id)
+    except Exception as e:
+        print(f"Error renewing document: {e}")
+        record_error('document_store')
+        return False
+
+def document_not_found(document_id):
+    return jsonify({"error": f"Document '{document_id}' not found or expired", "status": "error"}), 404
+
+# Full-text search over every extraction result (SQLite FTS5). SEARCH_INDEX=off disables it;
+# point SEARCH_INDEX_PATH somewhere persistent to keep the index across reboots.
+SEARCH_INDEX = os.environ.get('SEARCH_INDEX', 'on').lower() != 'off'
+SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH') or os.path.join(
+    tempfile.gettempdir(), 'visionscript_search.sqlite3')
+SEARCH_MAX_PER_PAGE = 100
+search_index = None
+if SEARCH_INDEX:
+    try:
+        search_index = SearchIndex(SEARCH_INDEX_PATH)
+    except Exception as e:
+        print(f"Error opening search index, search is disabled: {e}")
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def index_document(pages, source_hash, kind, **metadata):
+    """Add an extraction result to the search index; returns its index id or None"""
+    if search_index is None:
+        return None
+    try:
+        with time_stage('indexing', kind):
+            return search_index.add(pages, source_hash, kind, **metadata)
+    except Exception as e:
+        print(f"Error indexing document: {e}")
+        record_error('indexing')
+        return None
+
 # Dictionary to cache EasyOCR readers for different languages
 readers = {}
-
-# Default reader (English)
-readers['en'] = easyocr.Reader(['en'])
+readers_lock = threading.Lock()
+
+# CPU inference backend for EasyOCR (torch, torch-fp32, onnx, onnx-int8) and the
+# number of threads each model call may use. Every OCR worker runs its own model
+# calls, so by default the cores are split between them instead of each worker
+# starting cpu_count threads (0 keeps the library default)
+OCR_INFERENCE_BACKEND = os.environ.get('OCR_INFERENCE_BACKEND', 'torch').lower()
+OCR_INFERENCE_THREADS = int(os.environ.get('OCR_INFERENCE_THREADS',
+                                           max(1, (os.cpu_count() or 1) // ocr_executor.max_workers)))
+
+def load_reader(lang_code):
+    """Construct an EasyOCR reader, recording the load in metrics"""
+    with READER_LOAD_SECONDS.time(language=lang_code):
+        languages = LATIN_LANGUAGES if lang_code == LATIN_LANGUAGE else [lang_code]
+        reader = build_reader(languages, OCR_INFERENCE_BACKEND, OCR_INFERENCE_THREADS)
+    READER_LOADS.inc(language=lang_code)
+    return reader
 
 # OpenRouter rate limiting
 class OpenRouterRateLimit:
@@ -139,34 +369,480 @@ SUPPORTED_LANGUAGES = {
     'hi': 'Hindi'
 }
 
+# Auto-detected Latin-script pages are read by one reader built with every supported
+# Latin-script language, so accented characters survive without knowing the language
+LATIN_LANGUAGE = 'latin'
+LATIN_LANGUAGES = ['en', 'fr', 'es', 'de', 'it', 'pt', 'nl']
+
+# Tesseract names its traineddata by ISO 639-2 codes, not the two-letter codes above
+TESSERACT_LANGUAGES = {
+    'en': 'eng',
+    'fr': 'fra',
+    'es': 'spa',
+    'de': 'deu',
+    'it': 'ita',
+    'pt': 'por',
+    'nl': 'nld',
+    'zh': 'chi_sim',
+    'ja': 'jpn',
+    'ko': 'kor',
+    'ru': 'rus',
+    'ar': 'ara',
+    'hi': 'hin'
+}
+
+latin_tesseract_languages = None
+
+def tesseract_lang(lang_code):
+    """Tesseract language for a supported language code (unknown codes are passed through)"""
+    if lang_code == LATIN_LANGUAGE:
+        return latin_tesseract_lang()
+    return TESSERACT_LANGUAGES.get(lang_code, lang_code)
+
+def latin_tesseract_lang():
+    """The installed Latin-script Tesseract languages joined with '+', or English if none can be listed"""
+    global latin_tesseract_languages
+    if latin_tesseract_languages is None:
+        try:
+            installed = set(pytesseract.get_languages(config=''))
+            codes = [TESSERACT_LANGUAGES[code] for code in LATIN_LANGUAGES if TESSERACT_LANGUAGES[code] in installed]
+        except Exception as e:
+            print(f"Error listing Tesseract languages: {e}")
+            codes = []
+        latin_tesseract_languages = '+'.join(codes) or 'eng'
+    return latin_tesseract_languages
+
 def get_reader(lang_code='en'):
     """Get or create an EasyOCR reader for the specified language"""
-    if lang_code not in SUPPORTED_LANGUAGES:
+    if lang_code not in SUPPORTED_LANGUAGES and lang_code != LATIN_LANGUAGE:
         lang_code = 'en'  # Default to English if unsupported
     
     if lang_code not in readers:
-        readers[lang_code] = easyocr.Reader([lang_code])
+        with readers_lock:
+            if lang_code not in readers:
+                readers[lang_code] = load_reader(lang_code)
     
     return readers[lang_code]
 
-def extract_text(file_path, model='easyocr', lang_code='en'):
+def run_easyocr(reader, image, lang_code='en'):
+    """Equivalent of reader.readtext with detection and recognition timed separately"""
+    from easyocr.utils import reformat_input
+    with time_stage('decode', 'easyocr', lang_code):
+        img, img_cv_grey = reformat_input(image)
+    with time_stage('detection', 'easyocr', lang_code):
+        horizontal_list, free_list = reader.detect(img)
+    with time_stage('recognition', 'easyocr', lang_code):
+        return reader.recognize(img_cv_grey, horizontal_list[0], free_list[0])
+
+# Images whose longest side exceeds TILE_THRESHOLD pixels are OCR'd as overlapping
+# TILE_SIZE tiles on TILE_WORKERS threads, which bounds detector memory per tile.
+# Tile threads make OCR_INFERENCE_THREADS-wide model calls just like OCR workers,
+# so they default to the same count to keep the total near the number of cores
+TILE_THRESHOLD = int(os.environ.get('TILE_THRESHOLD', 4000))
+TILE_SIZE = int(os.environ.get('TILE_SIZE', 1600))
+TILE_OVERLAP = int(os.environ.get('TILE_OVERLAP', 200))
+TILE_WORKERS = int(os.environ.get('TILE_WORKERS', 0)) or ocr_executor.max_workers
+TILES_PROCESSED = metrics_registry.counter(
+    'visionscript_ocr_tiles_total', 'Tiles recognized by tiled OCR', ['language'])
+tile_pool = None
+tile_pool_lock = threading.Lock()
+
+def get_tile_pool():
+    global tile_pool
+    if tile_pool is None:
+        with tile_pool_lock:
+            if tile_pool is None:
+                tile_pool = create_thread_pool(TILE_WORKERS, 'ocr-tile')
+    return tile_pool
+
+def use_tiling(width, height, tiling='auto'):
+    """Decide whether to tile; tiling is 'auto' (by size), 'on' or 'off'"""
+    if tiling == 'on':
+        return True
+    if tiling == 'off':
+        return False
+    return max(width, height) > TILE_THRESHOLD
+
+def run_easyocr_tiled(reader, image, lang_code='en'):
+    """Run EasyOCR over overlapping tiles of a large image in parallel"""
+    context = contextvars.copy_context()
+
+    def recognize(tile):
+        # Each tile thread gets its own copy of the request context for metrics labels
+        return context.copy().run(run_easyocr, reader, tile, lang_code)
+
+    results, tile_count = ocr_tiled(image, recognize, TILE_SIZE, TILE_OVERLAP, get_tile_pool())
+    TILES_PROCESSED.inc(tile_count, language=lang_code)
+    return results
+
+# Language code clients can send to have the script detected before OCR
+AUTO_LANGUAGE = 'auto'
+
+# Clients choose the model and language, and both end up in metric labels and cache
+# keys, so anything outside the known values is handled (and recorded) as 'other'
+OCR_MODELS = ('easyocr', 'pytesseract', 'cascade')
+
+def ocr_model(model):
+    return model if model in OCR_MODELS else 'other'
+
+def ocr_language(lang_code):
+    known = lang_code in SUPPORTED_LANGUAGES or lang_code in (AUTO_LANGUAGE, LATIN_LANGUAGE)
+    return lang_code if known else 'other'
+
+# Tesseract OSD script names mapped to the language whose reader handles that script
+SCRIPT_LANGUAGES = {
+    'Latin': LATIN_LANGUAGE,
+    'Cyrillic': 'ru',
+    'Arabic': 'ar',
+    'Devanagari': 'hi',
+    'Han': 'zh',
+    'Japanese': 'ja',
+    'Katakana': 'ja',
+    'Hiragana': 'ja',
+    'Hangul': 'ko',
+    'Korean': 'ko'
+}
+
+# Longest side of the downscaled copy used for script detection
+LANGUAGE_PROBE_MAX_SIDE = int(os.environ.get('LANGUAGE_PROBE_MAX_SIDE', 1200))
+
+def detect_language(image):
+    """Guess the OCR language from the script of a downscaled copy of the image.
+
+    Runs a single Tesseract OSD pass instead of trying full OCR in several
+    languages; falls back to English if the script cannot be identified.
+    """
+    start = time.perf_counter()
+    detection = {"language": 'en', "script": None, "confidence": 0.0, "method": 'default'}
+    try:
+        with time_stage('language_detection', 'osd'):
+            if isinstance(image, np.ndarray):
+                probe = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image)
+            else:
+                probe = Image.open(image).convert('L')
+            probe.thumbnail((LANGUAGE_PROBE_MAX_SIDE, LANGUAGE_PROBE_MAX_SIDE))
+            osd = pytesseract.image_to_osd(probe, output_type=pytesseract.Output.DICT)
+
+        script = osd.get('script')
+        if script in SCRIPT_LANGUAGES:
+            detection.update({
+                "language": SCRIPT_LANGUAGES[script],
+                "script": script,
+                "confidence": float(osd.get('script_conf', 0.0)),
+                "method": 'osd'
+            })
+    except Exception as e:
+        print(f"Error detecting language, defaulting to English: {e}")
+        record_error('language_detection')
+
+    detection["seconds"] = round(time.perf_counter() - start, 4)
+    return detection
+
+def resolve_language(image, lang_code):
+    """Return (lang_code, detection); detection is only set when lang_code is 'auto'"""
+    if lang_code != AUTO_LANGUAGE:
+        return lang_code, None
+    detection = detect_language(image)
+    return detection["language"], detection
+
+# Cascade OCR: Tesseract reads the whole image, and only lines whose confidence
+# (0-1) falls below CASCADE_CONFIDENCE are re-recognized by EasyOCR
+CASCADE_CONFIDENCE = float(os.environ.get('CASCADE_CONFIDENCE', 0.6))
+CASCADE_PADDING = int(os.environ.get('CASCADE_PADDING', 4))
+CASCADE_REGIONS = metrics_registry.counter(
+    'visionscript_cascade_regions_total', 'Lines recognized by cascade OCR, by final engine',
+    ['engine', 'language'])
+
+def tesseract_lines(grey, lang_code='en'):
+    """Run Tesseract once and group its words into lines with boxes and confidences.
+
+    Returns readtext-style (box, text, confidence) tuples; a line's confidence is
+    that of its weakest word, scaled to 0-1.
+    """
+    kwargs = {'lang': tesseract_lang(lang_code)} if lang_code != 'en' else {}
+    data = pytesseract.image_to_data(grey, output_type=pytesseract.Output.DICT, **kwargs)
+    lines = {}
+    for i, word in enumerate(data['text']):
+        confidence = float(data['conf'][i])
+        if not word.strip() or confidence < 0:
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        x0, y0 = data['left'][i], data['top'][i]
+        x1, y1 = x0 + data['width'][i], y0 + data['height'][i]
+        line = lines.setdefault(key, {'words': [], 'confidence': 100.0, 'rect': [x0, y0, x1, y1]})
+        line['words'].append(word)
+        line['confidence'] = min(line['confidence'], confidence)
+        rect = line['rect']
+        line['rect'] = [min(rect[0], x0), min(rect[1], y0), max(rect[2], x1), max(rect[3], y1)]
+
+    results = []
+    for line in lines.values():
+        x0, y0, x1, y1 = line['rect']
+        box = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+        results.append((box, ' '.join(line['words']), line['confidence'] / 100))
+    return results
+
+def run_cascade(image, lang_code='en', threshold=None):
+    """OCR with Tesseract first and EasyOCR only for low-confidence lines.
+
+    Returns (results, stats) where results are readtext-style tuples in reading
+    order and stats counts the lines that were escalated to EasyOCR.
+    """
+    threshold = CASCADE_CONFIDENCE if threshold is None else threshold
+    with time_stage('decode', 'cascade', lang_code):
+        if isinstance(image, np.ndarray):
+            grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        else:
+            grey = cv2.imread(image, cv2.IMREAD_GRAYSCALE)
+    height, width = grey.shape[:2]
+
+    try:
+        with time_stage('recognition', 'pytesseract', lang_code):
+            lines = tesseract_lines(grey, lang_code)
+    except Exception as e:
+        # Without a usable fast pass the whole image goes to EasyOCR
+        print(f"Error in cascade fast pass, falling back to EasyOCR: {e}")
+        record_error('cascade')
+        results = run_easyocr(get_reader(lang_code), grey, lang_code)
+        CASCADE_REGIONS.inc(len(results), engine='easyocr', language=lang_code)
+        return results, {"regions": len(results), "escalated": len(results), "fallback": True,
+                         "threshold": threshold}
+
+    low = [i for i, (_, _, confidence) in enumerate(lines) if confidence < threshold]
+    if low:
+        # Recognize all weak lines in one batched call on padded crops of the
+        # grayscale page, skipping EasyOCR's detector entirely
+        regions = {}
+        for i in low:
+            (x0, y0), _, (x1, y1), _ = lines[i][0]
+            region = (max(0, x0 - CASCADE_PADDING), min(width, x1 + CASCADE_PADDING),
+                      max(0, y0 - CASCADE_PADDING), min(height, y1 + CASCADE_PADDING))
+            regions[region] = i
+        reader = get_reader(lang_code)
+        with time_stage('recognition', 'easyocr', lang_code):
+            recognized = reader.recognize(grey, [list(region) for region in regions], [])
+        for box, text, confidence in recognized:
+            # EasyOCR reorders crops, so match them back to their line by corner points
+            (x0, y0), _, (x1, y1), _ = box
+            i = regions.get((x0, x1, y0, y1))
+            if i is not None and text.strip():
+                lines[i] = (lines[i][0], text, float(confidence))
+
+    stats = {"regions": len(lines), "escalated": len(low), "threshold": threshold}
+    CASCADE_REGIONS.inc(len(lines) - len(low), engine='pytesseract', language=lang_code)
+    CASCADE_REGIONS.inc(len(low), engine='easyocr', language=lang_code)
+    return lines, stats
+
+# Near-duplicate detection: an image within DEDUP_IMAGE_DISTANCE bits (of a 256-bit
+# dHash) of a recently OCR'd one, and whose thumbnail differs nowhere by more than
+# DEDUP_PIXEL_TOLERANCE gray levels, reuses its result; near-identical PDF pages are
+# reported, and sentences repeated above DEDUP_TEXT_THRESHOLD are dropped before summarizing.
+# Image reuse is on for camera frames, whose thumbnails keep their full resolution.
+# Uploads are compared on a 1024px thumbnail, which cannot tell small print apart (1,234.56
+# vs 1.234.56), so reusing their results is opt-in with DEDUP_UPLOADS=on.
+DEDUP = os.environ.get('DEDUP', 'on').lower() != 'off'
+DEDUP_UPLOADS = DEDUP and os.environ.get('DEDUP_UPLOADS', 'off').lower() == 'on'
+DEDUP_IMAGE_DISTANCE = int(os.environ.get('DEDUP_IMAGE_DISTANCE', 12))
+DEDUP_PIXEL_TOLERANCE = int(os.environ.get('DEDUP_PIXEL_TOLERANCE', 40))
+DEDUP_TEXT_THRESHOLD = float(os.environ.get('DEDUP_TEXT_THRESHOLD', 0.85))
+DEDUP_CACHE_SIZE = int(os.environ.get('DEDUP_CACHE_SIZE', 256))
+DEDUP_HITS = metrics_registry.counter(
+    'visionscript_dedup_hits_total', 'Pages, images and sentences skipped as near-duplicates', ['kind'])
+DEDUP_SECONDS_SAVED = metrics_registry.counter(
+    'visionscript_dedup_seconds_saved_total', 'OCR time avoided by reusing near-duplicate results', ['kind'])
+page_cache = PerceptualCache(DEDUP_CACHE_SIZE, DEDUP_IMAGE_DISTANCE, DEDUP_PIXEL_TOLERANCE)
+
+def image_fingerprint(image):
+    """ImageFingerprint of an image path or decoded frame, or None if it cannot be read"""
+    with time_stage('fingerprint'):
+        if isinstance(image, np.ndarray):
+            grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            # Decoded frames are verified pixel for pixel, so small print cannot be confused
+            return ImageFingerprint(grey, thumbnail_width=grey.shape[1]) if grey.size else None
+        else:
+            # Let the decoder downscale large scans as far as the 1024px thumbnail allows
+            with Image.open(image) as img:
+                width = img.size[0]
+            reduced = {2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+                       8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+            factor = max([1] + [f for f in reduced if width // f >= 1024])
+            grey = cv2.imread(image, reduced.get(factor, cv2.IMREAD_GRAYSCALE))
+        if grey is None or grey.size == 0:
+            return None
+        return ImageFingerprint(grey)
+
+def cached_ocr(image, key, run, enabled=None):
+    """Return (run(), None), or (earlier result, dedup info) if a near-identical
+    image was OCR'd under the same key recently; enabled defaults to DEDUP"""
+    enabled = DEDUP if enabled is None else enabled
+    fingerprint = image_fingerprint(image) if enabled else None
+    if fingerprint is None:
+        return run(), None
+    cached, distance = page_cache.lookup(key, fingerprint)
+    if cached is not None:
+        result, seconds = cached
+        DEDUP_HITS.inc(kind='image')
+        DEDUP_SECONDS_SAVED.inc(seconds, kind='image')
+        return result, {"reused": True, "distance": distance, "seconds_saved": round(seconds, 3)}
+    start = time.perf_counter()
+    result = run()
+    page_cache.store(key, fingerprint, (result, time.perf_counter() - start))
+    return result, None
+
+def duplicate_pages(pages):
+    """List the pages that repeat an earlier page of the same document"""
+    with time_stage('dedup', 'minhash'):
+        matches = find_near_duplicates(pages, DEDUP_TEXT_THRESHOLD)
+    duplicates = [{"page": index + 1, "duplicate_of": match[0] + 1, "similarity": round(match[1], 3)}
+                  for index, match in enumerate(matches) if match is not None]
+    DEDUP_HITS.inc(len(duplicates), kind='pdf_page')
+    return duplicates
+
+def remove_duplicate_sentences(text):
+    """Drop repeated sentences before summarizing; returns (text, dedup info)"""
+    ensure_nltk_data()
+    with time_stage('dedup', 'minhash'):
+        sentences = nltk.sent_tokenize(text)
+        kept, removed = dedupe_sentences(sentences, DEDUP_TEXT_THRESHOLD)
+    DEDUP_HITS.inc(removed, kind='sentence')
+    info = {"sentences": len(sentences), "duplicates_removed": removed}
+    if not removed:
+        return text, info
+    deduped = ' '.join(kept)
+    info["characters_saved"] = len(text) - len(deduped)
+    return deduped, info
+
+def extract_text(file_path, model='easyocr', lang_code='en', tiling='auto'):
+    return extract_text_details(file_path, model, lang_code, tiling)[0]
+
+def extract_text_details(file_path, model='easyocr', lang_code='en', tiling='auto'):
+    """Like extract_text, but returns (text, details) with engine-specific details
+    such as cascade escalation counts, reusing results for near-duplicate images
+    when DEDUP_UPLOADS is on"""
+    model, lang_code = ocr_model(model), ocr_language(lang_code)
+    lang_code, _ = resolve_language(file_path, lang_code)
+    (text, details), dedup = cached_ocr(
+        file_path, ('file', model, lang_code, tiling),
+        lambda: _extract_text_details(file_path, model, lang_code, tiling), DEDUP_UPLOADS)
+    if dedup:
+        details = dict(details, deduplication=dedup)
+    return text, details
+
+def ocr_layout(results, size=None, model='easyocr', lang_code='en'):
+    """Group readtext-style results into lines, blocks and tables in reading order"""
+    with time_stage('layout', model, lang_code):
+        return analyze_layout(results, size)
+
+def _extract_text_details(file_path, model, lang_code, tiling):
+    """Returns (text, details); EasyOCR and cascade details include a LayoutResult under 'layout'"""
+    if model == 'cascade':
+        results, stats = run_cascade(file_path, lang_code)
+        layout = ocr_layout(results, model=model, lang_code=lang_code)
+        return layout.text(), {"cascade": stats, "layout": layout}
     if model == 'pytesseract':
-        img = Image.open(file_path)
+        with time_stage('decode', model, lang_code):
+            img = Image.open(file_path)
+            img.load()
         # For pytesseract, we use the language parameter if available
-        if lang_code != 'en':
-            return pytesseract.image_to_string(img, lang=lang_code)
-        else:
-            return pytesseract.image_to_string(img)
+        with time_stage('recognition', model, lang_code):
+            if lang_code != 'en':
+                return pytesseract.image_to_string(img, lang=tesseract_lang(lang_code)), {}
+            else:
+                return pytesseract.image_to_string(img), {}
     else:
         reader = get_reader(lang_code)
-        results = reader.readtext(file_path)
-        return ' '.join([res[1] for res in results])
+        with Image.open(file_path) as img:
+            width, height = img.size
+        if use_tiling(width, height, tiling):
+            with time_stage('decode', 'easyocr', lang_code):
+                image = cv2.imread(file_path, cv2.IMREAD_COLOR)
+            results = run_easyocr_tiled(reader, image, lang_code)
+        else:
+            results = run_easyocr(reader, file_path, lang_code)
+        layout = ocr_layout(results, (width, height), model, lang_code)
+        return layout.text(), {"layout": layout}
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose instrumentation in the Prometheus text format"""
+    return Response(metrics_registry.render(), mimetype=METRICS_CONTENT_TYPE)
+
+@app.route('/documents/<document_id>', methods=['GET'])
+def get_document(document_id):
+    """Fetch a stored extraction result or summary"""
+    document = document_store.get(document_id)
+    if document is None:
+        return document_not_found(document_id)
+    return jsonify({
+        "document_id": document['id'],
+        "kind": document['kind'],
+        "text": document['text'],
+        "metadata": document['metadata'],
+        "expires_at": datetime.fromtimestamp(document['expires']).isoformat(),
+        "status": "success"
+    })
+
+@app.route('/documents/<document_id>', methods=['DELETE'])
+def delete_document(document_id):
+    if not document_store.delete(document_id):
+        return document_not_found(document_id)
+    return jsonify({"document_id": document_id, "status": "deleted"})
+
+@app.route('/search', methods=['GET'])
+def search():
+    """Ranked full-text search over all extracted documents"""
+    if search_index is None:
+        return jsonify({"error": "Search index is disabled", "status": "error"}), 503
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "No search query provided", "status": "error"}), 400
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(SEARCH_MAX_PER_PAGE, max(1, int(request.args.get('per_page', 10))))
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers", "status": "error"}), 400
+
+    with time_stage('search'):
+        total, hits = search_index.search(query, page, per_page,
+                                          language=request.args.get('language'),
+                                          kind=request.args.get('kind'),
+                                          match=request.args.get('match', 'all'))
+    return jsonify({
+        "query": query,
+        "results": hits,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": math.ceil(total / per_page),
+        "status": "success"
+    })
+
+@app.route('/search/documents/<int:index_id>', methods=['GET'])
+def search_document(index_id):
+    """Full text of an indexed document, page by page"""
+    if search_index is None:
+        return jsonify({"error": "Search index is disabled", "status": "error"}), 503
+    document = search_index.get(index_id)
+    if document is None:
+        return jsonify({"error": f"Indexed document {index_id} not found", "status": "error"}), 404
+    document["status"] = "success"
+    return jsonify(document)
+
+@app.route('/search/documents/<int:index_id>', methods=['DELETE'])
+def delete_search_document(index_id):
+    if search_index is None:
+        return jsonify({"error": "Search index is disabled", "status": "error"}), 503
+    if not search_index.delete(index_id):
+        return jsonify({"error": f"Indexed document {index_id} not found", "status": "error"}), 404
+    return jsonify({"index_id": index_id, "status": "deleted"})
 
 @app.route('/supported_languages', methods=['GET'])
 def supported_languages():
     """Return a list of supported languages"""
     return jsonify({
-        "languages": SUPPORTED_LANGUAGES
+        "languages": SUPPORTED_LANGUAGES,
+        "auto_detect": AUTO_LANGUAGE
     })
 
 @app.route('/summarization_options', methods=['GET'])
@@ -197,17 +873,37 @@ def summarization_options():
 
 def extract_text_from_pdf(pdf_file):
     """Extract text from PDF file"""
+    pages = extract_pdf_pages(pdf_file)
+    if pages is None:
+        return None
+    return "\n".join(pages).strip()
+
+def extract_pdf_pages_from_file(pdf_path):
+    """Extract page texts from a PDF on disk without reading it into memory"""
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
+        with mapped_file(pdf_path) as mapped:
+            return extract_pdf_pages(mapped)
+    except (OSError, ValueError) as e:
+        print(f"Error mapping PDF file: {e}")
+        record_error('pdf_extraction')
+        return None
+
+def extract_pdf_pages(pdf_file):
+    """Extract the text of each page of a PDF file, or None on failure"""
+    try:
+        with time_stage('decode', 'pypdf2'):
+            pdf_reader = PyPDF2.PdfReader(pdf_file)
+        pages = []
 
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text() + "\n"
+        with time_stage('recognition', 'pypdf2'):
+            for page_num in range(len(pdf_reader.pages)):
+                page = pdf_reader.pages[page_num]
+                pages.append(page.extract_text())
 
-        return text.strip()
+        return pages
     except Exception as e:
         print(f"Error extracting PDF text: {e}")
+        record_error('pdf_extraction')
         return None
 
 @app.route('/extract_pdf_text', methods=['POST'])
@@ -225,22 +921,39 @@ def extract_pdf_text():
         if not pdf_file.filename.lower().endswith('.pdf'):
             return jsonify({"error": "File must be a PDF"}), 400
 
-        # Extract text from PDF
-        extracted_text = extract_text_from_pdf(pdf_file)
+        # Extract text from PDF (spooled to disk and parsed through a memory map)
+        pdf_path = spool_upload(pdf_file, UPLOAD_SPOOL_DIR)
+        try:
+            pages = pdf_executor.run(extract_pdf_pages_from_file, pdf_path)
+            source_hash = file_sha256(pdf_path)
+        finally:
+            remove_quietly(pdf_path)
 
-        if extracted_text is None:
+        if pages is None:
             return jsonify({"error": "Failed to extract text from PDF"}), 500
 
-        if not extracted_text.strip():
+        extracted_text = "\n".join(pages).strip()
+        if not extracted_text:
             return jsonify({"error": "No text found in PDF"}), 400
 
-        return jsonify({
+        document_id = store_document(extracted_text, 'pdf', filename=pdf_file.filename)
+        index_document(pages, source_hash, 'pdf', filename=pdf_file.filename,
+                       model='pypdf2', document_id=document_id)
+
+        response = {
             "text": extracted_text,
+            "document_id": document_id,
+            "page_count": len(pages),
             "filename": pdf_file.filename,
             "word_count": len(extracted_text.split()),
             "status": "success"
-        })
+        }
+        if DEDUP:
+            response["duplicate_pages"] = pdf_executor.run(duplicate_pages, pages)
+        return jsonify(response)
 
+    except (ExecutorBusy, UploadTooLarge, RequestEntityTooLarge):
+        raise
     except Exception as e:
         return jsonify({
             "error": str(e),
@@ -250,17 +963,47 @@ def extract_pdf_text():
 @app.route('/upload_image', methods=['POST'])
 def upload_image():
     file = request.files['image']
-    model = request.form.get('model', 'easyocr').lower()
-    lang_code = request.form.get('language', 'en').lower()
+    model = ocr_model(request.form.get('model', 'easyocr').lower())
+    lang_code = ocr_language(request.form.get('language', 'en').lower())
+    tiling = request.form.get('tiling', 'auto').lower()  # auto, on, off
+    include_layout = request.form.get('layout', 'false').lower() == 'true'
     
-    file_path = os.path.join(tempfile.gettempdir(), file.filename)
-    file.save(file_path)
-    
-    extracted_text = extract_text(file_path, model, lang_code)
+    file_path = spool_upload(file, UPLOAD_SPOOL_DIR)
+    try:
+        return recognize_upload(file, file_path, model, lang_code, tiling, include_layout)
+    finally:
+        remove_quietly(file_path)
+
+def recognize_upload(file, file_path, model, lang_code, tiling, include_layout=False):
+    try:
+        check_image_dimensions(file_path, MAX_IMAGE_PIXELS)
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+
+    lang_code, detection = ocr_executor.run(resolve_language, file_path, lang_code)
+    extracted_text, details = ocr_executor.run(extract_text_details, file_path, model, lang_code, tiling)
+    # Copy before popping: details may be shared with the near-duplicate cache
+    details = dict(details)
+    layout = details.pop('layout', None)
+    layout_data = layout.to_dict() if layout is not None else None
     
-    return jsonify({
-        "recognized_text": extracted_text
-    })
+    # The stored layout lets exports rebuild tables without running OCR again
+    document_id = store_document(extracted_text, 'ocr', filename=file.filename, model=model, language=lang_code,
+                                 layout=layout_data)
+    index_document([extracted_text], file_sha256(file_path), 'ocr', filename=file.filename, model=model,
+                   language=lang_code, document_id=document_id)
+    response = {
+        "recognized_text": extracted_text,
+        "document_id": document_id
+    }
+    response.update(details)
+    if layout is not None:
+        response["tables"] = len(layout.tables())
+        if include_layout:
+            response["layout"] = layout_data
+    if detection:
+        response["language_detection"] = detection
+    return jsonify(response)
 
 @app.route('/download_format', methods=['POST'])
 def download_format():
@@ -270,11 +1013,32 @@ def download_format():
     statistics = request.form.get('statistics', '')
     is_summary = request.form.get('is_summary', 'false').lower() == 'true'
 
+    # A stored document replaces the posted text; summaries bring their source along
+    document_id = request.form.get('document_id')
+    layout_data = None
+    if document_id:
+        document = document_store.get(document_id)
+        if document is None:
+            return document_not_found(document_id)
+        text_data = document['text']
+        layout_data = document['metadata'].get('layout')
+        if document['kind'] == 'summary':
+            is_summary = True
+            source_id = document['metadata'].get('source_document_id')
+            source = document_store.get(source_id)
+            if source_id and source is None:
+                # Never export a summary-only report in place of the full one; clients resend the text
+                return document_not_found(source_id)
+            if source is not None:
+                original_text = source['text']
+            if not statistics:
+                statistics = format_statistics(document['metadata'].get('statistics') or {})
+
     filename_prefix = "summary" if is_summary else "extracted_text"
 
     if chosen_format == 'txt':
         tmp_path = os.path.join(tempfile.gettempdir(), f"{filename_prefix}.txt")
-        with open(tmp_path, 'w', encoding='utf-8') as f:
+        with time_stage('export', chosen_format), open(tmp_path, 'w', encoding='utf-8') as f:
             if is_summary and original_text:
                 f.write("=== ORIGINAL TEXT ===\n\n")
                 f.write(original_text)
@@ -288,59 +1052,77 @@ def download_format():
 
     elif chosen_format == 'docx':
         from docx import Document
-        doc = Document()
-
-        if is_summary and original_text:
-            doc.add_heading('Text Summary Report', 0)
-            doc.add_heading('Original Text', level=1)
-            doc.add_paragraph(original_text)
-            doc.add_heading('Summary', level=1)
-            doc.add_paragraph(text_data)
-            if statistics:
-                doc.add_heading('Statistics', level=1)
-                doc.add_paragraph(statistics)
-        else:
-            doc.add_paragraph(text_data)
-
         tmp_path = os.path.join(tempfile.gettempdir(), f"{filename_prefix}.docx")
-        doc.save(tmp_path)
+        with time_stage('export', chosen_format):
+            doc = Document()
+
+            if is_summary and original_text:
+                doc.add_heading('Text Summary Report', 0)
+                doc.add_heading('Original Text', level=1)
+                doc.add_paragraph(original_text)
+                doc.add_heading('Summary', level=1)
+                doc.add_paragraph(text_data)
+                if statistics:
+                    doc.add_heading('Statistics', level=1)
+                    doc.add_paragraph(statistics)
+            else:
+                doc.add_paragraph(text_data)
+
+            doc.save(tmp_path)
         return send_file(tmp_path, as_attachment=True)
 
     elif chosen_format == 'excel':
         tmp_path = os.path.join(tempfile.gettempdir(), f"{filename_prefix}.xlsx")
-        workbook = xlsxwriter.Workbook(tmp_path)
-        worksheet = workbook.add_worksheet()
-
-        # Add headers
-        header_format = workbook.add_format({'bold': True, 'bg_color': '#333333', 'font_color': 'white'})
+        with time_stage('export', chosen_format):
+            workbook = xlsxwriter.Workbook(tmp_path)
+            worksheet = workbook.add_worksheet()
 
-        if is_summary and original_text:
-            worksheet.write(0, 0, 'Section', header_format)
-            worksheet.write(0, 1, 'Content', header_format)
+            # Add headers
+            header_format = workbook.add_format({'bold': True, 'bg_color': '#333333', 'font_color': 'white'})
 
-            row = 1
-            worksheet.write(row, 0, 'Original Text')
-            worksheet.write(row, 1, original_text)
-            row += 1
+            if is_summary and original_text:
+                worksheet.write(0, 0, 'Section', header_format)
+                worksheet.write(0, 1, 'Content', header_format)
 
-            worksheet.write(row, 0, 'Summary')
-            worksheet.write(row, 1, text_data)
-            row += 1
+                row = 1
+                worksheet.write(row, 0, 'Original Text')
+                worksheet.write(row, 1, original_text)
+                row += 1
 
-            if statistics:
-                worksheet.write(row, 0, 'Statistics')
-                worksheet.write(row, 1, statistics)
-        else:
-            worksheet.write(0, 0, 'Content', header_format)
-            for idx, line in enumerate(text_data.split('\n')):
-                worksheet.write(idx + 1, 0, line)
+                worksheet.write(row, 0, 'Summary')
+                worksheet.write(row, 1, text_data)
+                row += 1
 
-        workbook.close()
+                if statistics:
+                    worksheet.write(row, 0, 'Statistics')
+                    worksheet.write(row, 1, statistics)
+            else:
+                worksheet.write(0, 0, 'Content', header_format)
+                for idx, line in enumerate(text_data.split('\n')):
+                    worksheet.write(idx + 1, 0, line)
+                # Tables found by layout analysis get a sheet each, filled cell by cell
+                for table_number, table in enumerate(layout_tables(layout_data), start=1):
+                    table_sheet = workbook.add_worksheet(f'Table {table_number}')
+                    for row, cells in enumerate(table['cells']):
+                        for column, cell in enumerate(cells):
+                            table_sheet.write(row, column, cell)
+
+            workbook.close()
         return send_file(tmp_path, as_attachment=True)
 
     else:
         return jsonify({"error": "Invalid format"}), 400
 
+def layout_tables(layout_data):
+    """Tables of a stored layout, or none if it is missing or unreadable"""
+    if not layout_data:
+        return []
+    try:
+        return LayoutResult.from_dict(layout_data).tables()
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Error reading stored layout: {e}")
+        return []
+
 def clean_extracted_text(text, lang_code='en'):
     # Default keys (English)
     keys = [
@@ -385,16 +1167,23 @@ def clean_extracted_text(text, lang_code='en'):
     
     return extracted_data
 
-# Initialize NLTK data (download required data if not present)
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+nltk_data_ready = False
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+def ensure_nltk_data():
+    """Initialize NLTK data (download required data if not present)"""
+    global nltk_data_ready
+    if nltk_data_ready:
+        return
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
+    nltk_data_ready = True
 
 def clean_text(text):
     """Clean and preprocess text for summarization"""
@@ -404,6 +1193,14 @@ def clean_text(text):
     text = re.sub(r'[^\w\s.,!?;:-]', '', text)
     return text
 
+def format_statistics(stats):
+    """Plain-text statistics block used in exported summary reports"""
+    if not stats:
+        return ''
+    return (f"Word Count Reduction: {stats['reduction_percentage']}%\n"
+            f"Original: {stats['original_word_count']} words ({stats['original_reading_time_minutes']} min read)\n"
+            f"Summary: {stats['summary_word_count']} words ({stats['summary_reading_time_minutes']} min read)")
+
 def get_text_statistics(original_text, summary_text):
     """Calculate statistics for the summarization"""
     original_words = len(original_text.split())
@@ -425,19 +1222,24 @@ def get_text_statistics(original_text, summary_text):
 
 def score_sentences(sentences, text):
     """Score sentences based on multiple factors for better summarization"""
-    import string
-    from collections import defaultdict
+    ensure_nltk_data()
+
 
     # Calculate word frequencies
-    words = nltk.word_tokenize(text.lower())
-    stop_words = set(nltk.corpus.stopwords.words('english'))
-    words = [word for word in words if word.isalpha() and word not in stop_words]
-    word_freq = Counter(words)
+    with time_stage('tokenization'):
+        words = nltk.word_tokenize(text.lower())
+        stop_words = set(nltk.corpus.stopwords.words('english'))
+        words = [word for word in words if word.isalpha() and word not in stop_words]
+        word_freq = Counter(words)
+        tokenized_sentences = [nltk.word_tokenize(sentence.lower()) for sentence in sentences]
 
+    with time_stage('scoring'):
+        return _score_tokenized_sentences(tokenized_sentences, word_freq, stop_words)
+
+def _score_tokenized_sentences(tokenized_sentences, word_freq, stop_words):
     sentence_scores = defaultdict(float)
 
-    for i, sentence in enumerate(sentences):
-        sentence_words = nltk.word_tokenize(sentence.lower())
+    for i, sentence_words in enumerate(tokenized_sentences):
         sentence_words = [word for word in sentence_words if word.isalpha() and word not in stop_words]
 
         if len(sentence_words) == 0:
@@ -447,7 +1249,7 @@ def score_sentences(sentences, text):
         freq_score = sum(word_freq.get(word, 0) for word in sentence_words) / len(sentence_words)
 
         # Factor 2: Position score (earlier sentences are more important)
-        position_score = 1.0 - (i / len(sentences)) * 0.5
+        position_score = 1.0 - (i / len(tokenized_sentences)) * 0.5
 
         # Factor 3: Length score (prefer medium-length sentences)
         length_score = min(len(sentence_words) / 20, 1.0) if len(sentence_words) > 5 else 0.5
@@ -471,6 +1273,7 @@ def score_sentences(sentences, text):
 def extractive_summarize(text, algorithm='textrank', sentences_count=3):
     """Perform intelligent extractive summarization"""
     try:
+        ensure_nltk_data()
         cleaned_text = clean_text(text)
         if len(cleaned_text.split()) < 20:
             return text  # Return original if too short
@@ -493,6 +1296,12 @@ def extractive_summarize(text, algorithm='textrank', sentences_count=3):
             return ' '.join(summary_sentences)
         else:
             # Use existing algorithms but with better sentence selection
+            from sumy.parsers.plaintext import PlaintextParser
+            from sumy.nlp.tokenizers import Tokenizer
+            from sumy.summarizers.lsa import LsaSummarizer
+            from sumy.summarizers.luhn import LuhnSummarizer
+            from sumy.summarizers.text_rank import TextRankSummarizer
+
             parser = PlaintextParser.from_string(cleaned_text, Tokenizer("english"))
 
             if algorithm == 'lsa':
@@ -520,11 +1329,13 @@ def extractive_summarize(text, algorithm='textrank', sentences_count=3):
 
     except Exception as e:
         print(f"Error in extractive summarization: {e}")
+        record_error('summarization')
         return text
 
 def bullet_point_summarize(text, max_points=5):
     """Create smart bullet point summary"""
     try:
+        ensure_nltk_data()
         cleaned_text = clean_text(text)
         sentences = nltk.sent_tokenize(cleaned_text)
 
@@ -552,11 +1363,13 @@ def bullet_point_summarize(text, max_points=5):
         return '\n'.join(bullet_points)
     except Exception as e:
         print(f"Error in bullet point summarization: {e}")
+        record_error('summarization')
         return f"• {text}"
 
 def extract_key_phrases(text, max_phrases=10):
     """Extract key phrases from the text"""
     try:
+        ensure_nltk_data()
         cleaned_text = clean_text(text)
         words = nltk.word_tokenize(cleaned_text.lower())
 
@@ -573,11 +1386,13 @@ def extract_key_phrases(text, max_phrases=10):
         return ', '.join(key_phrases)
     except Exception as e:
         print(f"Error in key phrase extraction: {e}")
+        record_error('summarization')
         return "Unable to extract key phrases"
 
 def abstractive_summarize(text, target_length=3):
     """Create an abstractive summary by combining key concepts"""
     try:
+        ensure_nltk_data()
         cleaned_text = clean_text(text)
         sentences = nltk.sent_tokenize(cleaned_text)
 
@@ -628,6 +1443,7 @@ def abstractive_summarize(text, target_length=3):
 
     except Exception as e:
         print(f"Error in abstractive summarization: {e}")
+        record_error('summarization')
         return extractive_summarize(text, 'smart', target_length)
 
 
@@ -726,7 +1542,7 @@ def openrouter_summarize(text, length='medium'):
             return None, "OpenRouter API key not found. Please set OPENROUTER_API_KEY in .env file."
 
         # Prepare the request
-        url = "https://openrouter.ai/api/v1/chat/completions"
+        url = os.environ.get('OPENROUTER_API_URL', "https://openrouter.ai/api/v1/chat/completions")
         headers = {
             "Authorization": f"Bearer {api_key}",
             "HTTP-Referer": os.environ.get('SITE_URL', 'http://localhost:3000'),
@@ -767,7 +1583,8 @@ def openrouter_summarize(text, length='medium'):
         }
 
         # Make the request
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
+        with time_stage('openrouter', payload['model']):
+            response = requests.post(url, headers=headers, json=payload, timeout=60)
 
         if response.status_code == 200:
             result = response.json()
@@ -796,10 +1613,13 @@ def openrouter_summarize(text, length='medium'):
             return None, f"API error: {response.status_code} - {response.text}"
 
     except requests.exceptions.Timeout:
+        record_error('openrouter')
         return None, "Request timeout. Please try again."
     except requests.exceptions.RequestException as e:
+        record_error('openrouter')
         return None, f"Network error: {str(e)}"
     except Exception as e:
+        record_error('openrouter')
         return None, f"Error: {str(e)}"
 
 @app.route('/openrouter_status', methods=['GET'])
@@ -826,18 +1646,73 @@ def test_openrouter():
             "success": False
         }), 500
 
+SUMMARY_ALGORITHMS = ('textrank', 'lsa', 'luhn', 'smart', 'abstractive')
+
+def summary_sentence_count(text, length, algorithm=''):
+    """Determine sentence count based on length and text size"""
+    ensure_nltk_data()
+    # The algorithm comes from the client, so only known names become metric labels
+    with time_stage('tokenization', algorithm if not algorithm or algorithm in SUMMARY_ALGORITHMS else 'other'):
+        text_sentences = len(nltk.sent_tokenize(text))
+    return sentences_for_length(text_sentences, length)
+
+def sentences_for_length(text_sentences, length):
+    if length == 'short':
+        return max(1, min(3, text_sentences // 4))
+    elif length == 'long':
+        return max(3, min(8, text_sentences // 2))
+    else:  # medium
+        return max(2, min(5, text_sentences // 3))
+
+def format_ai_summary(text, or_summary, summary_type, length):
+    """Convert an OpenRouter summary into the requested summary type"""
+    sentences_count = summary_sentence_count(text, length)
+    if summary_type == 'bullets':
+        return bullet_point_summarize(or_summary, sentences_count)
+    elif summary_type == 'keyphrases':
+        return extract_key_phrases(or_summary, sentences_count * 2)
+    return or_summary
+
+def local_summary(text, algorithm, smart_option, summary_type, length):
+    """Summarize with the local algorithms (including local smart)"""
+    sentences_count = summary_sentence_count(text, length, algorithm)
+    if summary_type == 'bullets':
+        if algorithm == 'abstractive':
+            # Create abstractive summary first, then convert to bullets
+            para_summary = abstractive_summarize(text, sentences_count)
+            return bullet_point_summarize(para_summary, sentences_count)
+        return bullet_point_summarize(text, sentences_count)
+    elif summary_type == 'keyphrases':
+        return extract_key_phrases(text, sentences_count * 2)
+    else:  # paragraph
+        if algorithm == 'abstractive':
+            return abstractive_summarize(text, sentences_count)
+        elif smart_option == 'local_smart':
+            return extractive_summarize(text, 'smart', sentences_count)
+        return extractive_summarize(text, algorithm, sentences_count)
+
 @app.route('/summarize_text', methods=['POST'])
 def summarize_text():
     """Summarize text with various options"""
     try:
         data = request.get_json()
 
-        if not data or 'text' not in data:
+        if not data or ('text' not in data and 'document_id' not in data):
             return jsonify({"error": "No text provided"}), 400
 
-        text = data['text'].strip()
+        # Text can be sent inline or referenced by the id an extraction endpoint returned
+        source_document_id = data.get('document_id')
+        if source_document_id:
+            document = document_store.get(source_document_id)
+            if document is None:
+                return document_not_found(source_document_id)
+            text = document['text'].strip()
+        else:
+            text = data['text'].strip()
         if not text:
             return jsonify({"error": "Empty text provided"}), 400
+        if not source_document_id:
+            source_document_id = store_document(text, 'text')
 
         # Get parameters
         algorithm = data.get('algorithm', 'textrank')  # textrank, lsa, luhn, abstractive
@@ -845,27 +1720,18 @@ def summarize_text():
         summary_type = data.get('type', 'paragraph')  # paragraph, bullets, keyphrases
         length = data.get('length', 'medium')  # short, medium, long
 
-        # Determine sentence count based on length and text size
-        text_sentences = len(nltk.sent_tokenize(text))
-        if length == 'short':
-            sentences_count = max(1, min(3, text_sentences // 4))
-        elif length == 'long':
-            sentences_count = max(3, min(8, text_sentences // 2))
-        else:  # medium
-            sentences_count = max(2, min(5, text_sentences // 3))
+        # Repeated sentences (boilerplate, rescanned pages) would otherwise be weighted twice
+        summary_text, dedup = text, None
+        if DEDUP:
+            summary_text, dedup = summarize_executor.run(remove_duplicate_sentences, text)
 
         # Handle smart summarization first
         if smart_option == 'openrouter':
-            # Use OpenRouter API for summarization
-            or_summary, or_status = openrouter_summarize(text, length)
+            # Use OpenRouter API for summarization (network I/O stays on the request thread)
+            or_summary, or_status = openrouter_summarize(summary_text, length)
 
             if or_summary:
-                if summary_type == 'bullets':
-                    summary = bullet_point_summarize(or_summary, sentences_count)
-                elif summary_type == 'keyphrases':
-                    summary = extract_key_phrases(or_summary, sentences_count * 2)
-                else:
-                    summary = or_summary
+                summary = summarize_executor.run(format_ai_summary, summary_text, or_summary, summary_type, length)
             else:
                 # Fallback to local smart if OpenRouter fails
                 return jsonify({
@@ -874,38 +1740,36 @@ def summarize_text():
                     "status": "error"
                 }), 400
         else:
-            # Use local algorithms (including local smart)
-            if summary_type == 'bullets':
-                if algorithm == 'abstractive':
-                    # Create abstractive summary first, then convert to bullets
-                    para_summary = abstractive_summarize(text, sentences_count)
-                    summary = bullet_point_summarize(para_summary, sentences_count)
-                else:
-                    summary = bullet_point_summarize(text, sentences_count)
-            elif summary_type == 'keyphrases':
-                summary = extract_key_phrases(text, sentences_count * 2)
-            else:  # paragraph
-                if algorithm == 'abstractive':
-                    summary = abstractive_summarize(text, sentences_count)
-                elif smart_option == 'local_smart':
-                    summary = extractive_summarize(text, 'smart', sentences_count)
-                else:
-                    summary = extractive_summarize(text, algorithm, sentences_count)
+            summary = summarize_executor.run(local_summary, summary_text, algorithm, smart_option, summary_type, length)
 
         # Calculate statistics
         stats = get_text_statistics(text, summary)
+        summary_document_id = store_document(summary, 'summary', source_document_id=source_document_id,
+                                             statistics=stats)
+        if summary_document_id and source_document_id:
+            # The source must outlive the summary that refers to it, or exports lose the original text
+            renew_document(source_document_id)
 
-        return jsonify({
-            "original_text": text,
+        response = {
             "summary": summary,
+            "document_id": summary_document_id,
+            "source_document_id": source_document_id,
             "algorithm": algorithm,
             "smart_option": smart_option,
             "type": summary_type,
             "length": length,
             "statistics": stats,
             "status": "success"
-        })
-
+        }
+        if dedup:
+            response["deduplication"] = dedup
+        # The original text is only echoed back on request (or if it could not be stored)
+        if data.get('include_original') or source_document_id is None:
+            response["original_text"] = text
+        return jsonify(response)
+
+    except (ExecutorBusy, UploadTooLarge, RequestEntityTooLarge):
+        raise
     except Exception as e:
         print(f"Exception in summarize_text: {str(e)}")  # Debug log
         import traceback
@@ -918,48 +1782,80 @@ def summarize_text():
 @app.route('/extract_id_data', methods=['POST'])
 def extract_id_data():
     file = request.files['image']
-    lang_code = request.form.get('language', 'en').lower()
-    
-    file_path = os.path.join(tempfile.gettempdir(), file.filename)
-    file.save(file_path)
+    lang_code = ocr_language(request.form.get('language', 'en').lower())
     
-    extracted_text = extract_text(file_path, lang_code=lang_code)
+    file_path = spool_upload(file, UPLOAD_SPOOL_DIR)
+    try:
+        check_image_dimensions(file_path, MAX_IMAGE_PIXELS)
+        lang_code, _ = ocr_executor.run(resolve_language, file_path, lang_code)
+        extracted_text = ocr_executor.run(extract_text, file_path, lang_code=lang_code)
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    finally:
+        remove_quietly(file_path)
     extracted_data = clean_extracted_text(extracted_text, lang_code=lang_code)
     
     tmp_path = os.path.join(tempfile.gettempdir(), "id_card_data.xlsx")
-    workbook = xlsxwriter.Workbook(tmp_path)
-    worksheet = workbook.add_worksheet()
-    
-    # Add a header row with the detected language
-    header_format = workbook.add_format({'bold': True, 'bg_color': '#333333', 'font_color': 'white'})
-    language_name = SUPPORTED_LANGUAGES.get(lang_code, 'Unknown')
-    worksheet.write(0, 0, 'Field', header_format)
-    worksheet.write(0, 1, f'Value (Language: {language_name})', header_format)
-    
-    row = 1
-    for key, value in extracted_data.items():
-        worksheet.write(row, 0, key)
-        worksheet.write(row, 1, value)
-        row += 1
-    
-    workbook.close()
+    with time_stage('export', 'excel', lang_code):
+        workbook = xlsxwriter.Workbook(tmp_path)
+        worksheet = workbook.add_worksheet()
+        
+        # Add a header row with the detected language
+        header_format = workbook.add_format({'bold': True, 'bg_color': '#333333', 'font_color': 'white'})
+        language_name = 'Latin script' if lang_code == LATIN_LANGUAGE else SUPPORTED_LANGUAGES.get(lang_code, 'Unknown')
+        worksheet.write(0, 0, 'Field', header_format)
+        worksheet.write(0, 1, f'Value (Language: {language_name})', header_format)
+        
+        row = 1
+        for key, value in extracted_data.items():
+            worksheet.write(row, 0, key)
+            worksheet.write(row, 1, value)
+            row += 1
+        
+        workbook.close()
     
     return send_file(tmp_path, as_attachment=True, download_name="id_card_data.xlsx")
 
-@app.route('/camera_feed', methods=['POST'])
-def camera_feed():
-    try:
-        data = request.get_json()
-        if not data or 'image' not in data:
-            return jsonify({"error": "No image data provided"}), 400
-
-        model = data.get('model', 'easyocr').lower()
-        lang_code = data.get('language', 'en').lower()
-        image_bytes = base64.b64decode(data['image'])
+def camera_frame_detections(image_bytes, model='easyocr', lang_code='en', include_layout=False):
+    """Decode an encoded camera frame and run OCR on it"""
+    model, lang_code = ocr_model(model), ocr_language(lang_code)
+    with time_stage('decode', model, lang_code):
         nparr = np.frombuffer(image_bytes, np.uint8)
         frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if model == 'pytesseract':
+    if frame is None:
+        raise ValueError("Could not decode camera frame")
+    
+    lang_code, detection = resolve_language(frame, lang_code)
+    result, dedup = cached_ocr(frame, ('camera', model, lang_code),
+                               lambda: camera_frame_ocr(frame, model, lang_code))
+    result = dict(result)
+    layout = result.pop("layout", None)
+    if layout is not None:
+        # Detections are built from the layout arrays, so they come in reading order
+        result["detections"] = layout.detections()
+        if include_layout:
+            result["layout"] = layout.to_dict()
+    if dedup:
+        result["deduplication"] = dedup
+    if detection:
+        result["language_detection"] = detection
+    return result
+
+def camera_frame_ocr(frame, model='easyocr', lang_code='en'):
+    """OCR a decoded frame; EasyOCR and cascade results carry a LayoutResult, Tesseract plain detections"""
+    size = (frame.shape[1], frame.shape[0])
+    if model == 'cascade':
+        results, stats = run_cascade(frame, lang_code)
+        return {"layout": ocr_layout(results, size, model, lang_code), "cascade": stats}
+    if model == 'pytesseract':
+        return {"detections": camera_ocr(frame, model, lang_code)}
+    results = run_easyocr(get_reader(lang_code), frame, lang_code)
+    return {"layout": ocr_layout(results, size, model, lang_code)}
+
+def camera_ocr(frame, model='easyocr', lang_code='en'):
+    """Run the selected OCR engine on a decoded camera frame"""
+    if model == 'pytesseract':
+        with time_stage('preprocessing', model, lang_code):
             # Convert to grayscale
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
@@ -974,44 +1870,173 @@ def camera_feed():
             
             # Convert back to PIL image for Pytesseract
             img = Image.fromarray(gray)
-            
-            # Use optimized OCR settings with language support
-            config = '--psm 6 --oem 3'
+        
+        # Use optimized OCR settings with language support
+        config = '--psm 6 --oem 3'
+        with time_stage('recognition', model, lang_code):
             if lang_code != 'en':
-                extracted_text = pytesseract.image_to_string(img, lang=lang_code, config=config)
+                extracted_text = pytesseract.image_to_string(img, lang=tesseract_lang(lang_code), config=config)
             else:
                 extracted_text = pytesseract.image_to_string(img, config=config)
-            
-            return jsonify({
-                "detections": [{
-                    "text": extracted_text,
-                    "bbox": {"x": 0, "y": 0, "width": 100, "height": 20},
-                    "status": "success"
-                }]
-            })
-        else:
-            # EasyOCR implementation with language support
-            reader = get_reader(lang_code)
-            results = reader.readtext(frame)
-            detections = []
-            for (bbox, text, prob) in results:
-                (tl, tr, br, bl) = bbox
-                x = int(tl[0])
-                y = int(tl[1])
-                width = int(br[0] - tl[0])
-                height = int(br[1] - tl[1])
-                detections.append({
-                    "text": text,
-                    "bbox": {"x": x, "y": y, "width": width, "height": height},
-                    "status": "success"
-                })
-            return jsonify({"detections": detections})
+        
+        return [{
+            "text": extracted_text,
+            "bbox": {"x": 0, "y": 0, "width": 100, "height": 20},
+            "status": "success"
+        }]
+    else:
+        # EasyOCR implementation with language support
+        reader = get_reader(lang_code)
+        results = run_easyocr(reader, frame, lang_code)
+        return ocr_layout(results, (frame.shape[1], frame.shape[0]), model, lang_code).detections()
 
+@app.route('/camera_feed', methods=['POST'])
+def camera_feed():
+    try:
+        if request.content_length and request.content_length > MAX_CAMERA_FRAME_BYTES:
+            raise UploadTooLarge(f"Camera frame exceeds the {MAX_CAMERA_FRAME_BYTES // (1024 * 1024)} MB limit")
+        # Without caching, the raw body and base64 string can be freed as soon as the frame is decoded
+        data = request.get_json(cache=False)
+        if not data or 'image' not in data:
+            return jsonify({"error": "No image data provided"}), 400
+        image_bytes = base64.b64decode(data.pop('image'))
+        check_image_dimensions(io.BytesIO(image_bytes), MAX_IMAGE_PIXELS)
+
+        model = ocr_model(str(data.get('model', 'easyocr')).lower())
+        lang_code = ocr_language(str(data.get('language', 'en')).lower())
+
+        # Frames sent with a session_id also feed that session's running summary
+        session_id = data.get('session_id')
+        if session_id and camera_sessions.get(session_id) is None:
+            return camera_session_not_found(session_id)
+
+        result = ocr_executor.run(camera_frame_detections, image_bytes, model, lang_code, bool(data.get('layout')))
+
+        if session_id:
+            text = ' '.join(detection['text'] for detection in result['detections'])
+            updated = summarize_executor.run(update_camera_session, session_id, text)
+            if updated is None:
+                return camera_session_not_found(session_id)
+            session, (added, duplicates) = updated
+            result["session"] = dict(session.status(), session_id=session_id, new_sentences=added,
+                                     duplicate_frame_sentences=duplicates)
+            if data.get('include_summary'):
+                result["session"]["summary"] = camera_session_summary(session, data.get('length', 'medium'),
+                                                                      data.get('type', 'paragraph'))
+        return jsonify(result)
+
+    except (ExecutorBusy, UploadTooLarge, RequestEntityTooLarge):
+        raise
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
     except Exception as e:
+        record_error('camera_feed')
         return jsonify({
             "error": str(e),
             "status": "error"
         }), 500
 
+# Live camera sessions keep an incrementally updated summary of everything scanned so
+# far. Use CAMERA_SESSION_STORE=sqlite when running several workers so a session
+# created by one worker can take frames and serve summaries on the others.
+CAMERA_SESSION_STORE = os.environ.get('CAMERA_SESSION_STORE', 'memory').lower()
+CAMERA_SESSION_STORE_PATH = os.environ.get('CAMERA_SESSION_STORE_PATH') or os.path.join(
+    tempfile.gettempdir(), 'visionscript_camera_sessions.sqlite3')
+CAMERA_SESSION_TTL = int(os.environ.get('CAMERA_SESSION_TTL', 1800))
+CAMERA_SESSION_MAX = int(os.environ.get('CAMERA_SESSION_MAX', 100))
+
+def new_running_summary():
+    ensure_nltk_data()
+    return RunningSummary(nltk.word_tokenize, set(nltk.corpus.stopwords.words('english')), DEDUP_TEXT_THRESHOLD)
+
+camera_sessions = create_session_store(CAMERA_SESSION_STORE, new_running_summary, CAMERA_SESSION_TTL,
+                                       CAMERA_SESSION_MAX, CAMERA_SESSION_STORE_PATH)
+
+def camera_session_not_found(session_id):
+    return jsonify({"error": f"Camera session '{session_id}' not found or expired", "status": "error"}), 404
+
+def update_camera_session(session_id, text):
+    """Add a frame's text to a session; returns (session, (new sentences, duplicate sentences)),
+    or None if the session has expired"""
+    cleaned_text = clean_text(text)
+    if not cleaned_text:
+        session = camera_sessions.get(session_id)
+        return None if session is None else (session, (0, 0))
+    sentences = nltk.sent_tokenize(cleaned_text)
+    with time_stage('session_update'):
+        return camera_sessions.update(session_id, lambda session: session.add_sentences(sentences))
+
+def camera_session_summary(session, length='medium', summary_type='paragraph'):
+    """Summary of everything a session has seen, from its running sentence scores"""
+    with time_stage('scoring', 'running'):
+        count = sentences_for_length(session.status()["sentences"], length)
+        sentences = session.top_sentences(count)
+    if summary_type == 'bullets':
+        return '\n'.join(f"• {sentence[:-1] if sentence.endswith('.') else sentence}" for sentence in sentences)
+    return ' '.join(sentences)
+
+@app.route('/camera_sessions', methods=['POST'])
+def create_camera_session():
+    """Start a camera session whose frames build up a running summary"""
+    session_id, session = camera_sessions.create()
+    return jsonify(dict(session.status(), session_id=session_id, ttl_seconds=CAMERA_SESSION_TTL,
+                        status="success"))
+
+@app.route('/camera_sessions/<session_id>/summary', methods=['GET'])
+def get_camera_session_summary(session_id):
+    session = camera_sessions.get(session_id)
+    if session is None:
+        return camera_session_not_found(session_id)
+    summary_type = request.args.get('type', 'paragraph')  # paragraph, bullets
+    summary = camera_session_summary(session, request.args.get('length', 'medium'), summary_type)
+    return jsonify(dict(session.status(), session_id=session_id, summary=summary, type=summary_type,
+                        status="success"))
+
+@app.route('/camera_sessions/<session_id>', methods=['DELETE'])
+def delete_camera_session(session_id):
+    if not camera_sessions.delete(session_id):
+        return camera_session_not_found(session_id)
+    return jsonify({"session_id": session_id, "status": "deleted"})
+
+# Model warmup: 'background' loads models on a thread once the server is up,
+# 'preload' loads them at import time (e.g. gunicorn --preload, so forked workers
+# share model memory copy-on-write) and 'off' loads everything on first use.
+MODEL_WARMUP = os.environ.get('MODEL_WARMUP', 'background').lower()
+WARMUP_LANGUAGES = [code.strip() for code in os.environ.get('WARMUP_LANGUAGES', 'en').split(',') if code.strip()]
+
+def warm_imports():
+    import importlib
+    for name in ('cv2', 'easyocr', 'easyocr.utils', 'pytesseract', 'PyPDF2', 'nltk',
+                 'sumy.summarizers.text_rank', 'sumy.summarizers.lsa', 'sumy.summarizers.luhn'):
+        importlib.import_module(name)
+
+def warm_nltk():
+    ensure_nltk_data()
+    nltk.word_tokenize(nltk.sent_tokenize("Warm up the tokenizer.")[0])
+
+warmup = Warmup([('imports', warm_imports), ('nltk_data', warm_nltk)])
+for warmup_lang in WARMUP_LANGUAGES:
+    warmup.add_task(f'reader_{warmup_lang}', lambda lang=warmup_lang: get_reader(lang))
+
+if MODEL_WARMUP == 'preload':
+    warmup.run()
+elif MODEL_WARMUP == 'off':
+    warmup.mark_ready()
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness probe: configured models have been loaded"""
+    status = warmup.status()
+    status["readers_loaded"] = sorted(readers.keys())
+    return jsonify(status), 200 if warmup.is_ready else 503
+
 if __name__ == '__main__':
+    # With the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves requests
+    if MODEL_WARMUP == 'background' and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warmup.start()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,291 @@
+"""Prometheus-style metrics without external dependencies.
+
+In a single process the registry renders its own values. Under a pre-fork server
+call enable_multiprocess(directory): every process then writes its values to
+<pid>.json in that directory (at most once per flush interval, and whenever it
+renders), and /metrics on any worker sums counters and histograms over all the
+files, so scrapes never go backwards depending on which worker answers. Gauges
+are summed over the processes that are still alive.
+"""
+import atexit
+import copy
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets in seconds (OCR and API calls can take a while)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class for a labelled metric family"""
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+        self.registry = None
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def _changed(self):
+        if self.registry is not None:
+            self.registry.changed()
+
+    def snapshot(self):
+        """Copy of the current values, keyed by label values"""
+        with self._lock:
+            return copy.deepcopy(self._values)
+
+    def reset(self):
+        """Forget all values; used in a forked child, so the lock is replaced rather than taken"""
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def merge(self, total, value):
+        """Add one process's value for a label set into a running total"""
+        return value if total is None else total + value
+
+    def render(self, values=None):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        if values is None:
+            values = self.snapshot()
+        for key, value in sorted(values.items()):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._changed()
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+        self._changed()
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._changed()
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+        self._changed()
+
+    def merge(self, total, state):
+        if total is None:
+            return copy.deepcopy(state)
+        total['counts'] = [a + b for a, b in zip(total['counts'], state['counts'])]
+        total['sum'] += state['sum']
+        total['count'] += state['count']
+        return total
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state['counts']):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, ('le', _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsRegistry:
+    """Collects metric families and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.directory = None
+        self.flush_interval = 1.0
+        self._flush_lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                return self._metrics[metric.name]
+            metric.registry = self
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def enable_multiprocess(self, directory, flush_interval=1.0):
+        """Share values with the other processes writing to `directory` (see the module docstring)"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        # Values recorded before a fork stay in the parent's file; the child starts from zero
+        os.register_at_fork(before=self.flush, after_in_child=self._forked)
+        atexit.register(self.flush)
+
+    def _forked(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = 0.0
+        for metric in self._all_metrics():
+            metric.reset()
+
+    def _all_metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def changed(self):
+        if self.directory and time.time() - self._last_flush >= self.flush_interval:
+            self.flush(blocking=False)
+
+    def flush(self, blocking=True):
+        """Write this process's values to <pid>.json in the shared directory"""
+        if not self.directory or not self._flush_lock.acquire(blocking):
+            return
+        try:
+            self._last_flush = time.time()
+            data = {metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+                    for metric in self._all_metrics()}
+            path = os.path.join(self.directory, f"{os.getpid()}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics to {self.directory}: {e}")
+        finally:
+            self._flush_lock.release()
+
+    def _collect(self):
+        """Values of every metric summed over the processes sharing the directory"""
+        self.flush()
+        metrics = {metric.name: metric for metric in self._all_metrics()}
+        totals = {name: {} for name in metrics}
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                pid = int(os.path.basename(path)[:-len('.json')])
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except (ValueError, OSError):
+                continue
+            alive = _process_alive(pid)
+            for name, samples in data.items():
+                metric = metrics.get(name)
+                # Counts from exited workers still belong in the totals; their gauges do not
+                if metric is None or (metric.kind == 'gauge' and not alive):
+                    continue
+                for key, value in samples:
+                    key = tuple(key)
+                    totals[name][key] = metric.merge(totals[name].get(key), value)
+        return metrics, totals
+
+    def render(self):
+        lines = []
+        if self.directory:
+            metrics, totals = self._collect()
+            for name, metric in metrics.items():
+                lines.extend(metric.render(totals[name]))
+        else:
+            for metric in self._all_metrics():
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Global registry instance
+registry = MetricsRegistry()
+
+# Content type for the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
@@ -0,0 +1,270 @@
+"""Incremental extractive summaries for live camera sessions.
+
+A session keeps running word frequencies and per-sentence score terms, so each
+new frame only costs tokenizing its new sentences and touching the earlier
+sentences that share words with them. The summary itself is a vectorized
+top-k over the stored scores.
+
+Session stores:
+    memory  per-process dict (only the worker that created a session can serve it)
+    sqlite  sessions pickled into a SQLite file shared by all workers on the node
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import closing
+
+import numpy as np
+
+from dedupe import NearDuplicateIndex
+
+BACKENDS = ('memory', 'sqlite')
+
+
+class RunningSummary:
+    """Sentence scores kept up to date as text arrives.
+
+    Uses the same weighting as the batch scorer in main_test: word frequency
+    0.4, position 0.2, length 0.2 and keyword density 0.2, halved for sentences
+    under 5 or over 50 content words. Sentences that repeat an earlier one
+    (overlapping frames of the same page) are dropped.
+    """
+
+    def __init__(self, word_tokenize, stop_words, threshold=0.85):
+        self.word_tokenize = word_tokenize
+        self.stop_words = stop_words
+        self.sentences = []
+        self.word_freq = Counter()
+        self.postings = defaultdict(list)  # word -> [(sentence index, count in sentence)]
+        self.freq_sums = []  # sum of word_freq over each sentence's content words
+        self.word_counts = []
+        self.static_scores = []  # length and keyword density terms, which never change
+        self.penalties = []
+        self.duplicates = 0
+        self.dedup = NearDuplicateIndex(threshold)
+        self.lock = threading.Lock()
+        self.updated = time.time()
+
+    def add_sentences(self, sentences):
+        """Add new sentences; returns (added, duplicates)"""
+        added = duplicates = 0
+        with self.lock:
+            for sentence in sentences:
+                sentence = sentence.strip()
+                if not sentence:
+                    continue
+                index = len(self.sentences)
+                if self.dedup.add(sentence, index) is not None:
+                    duplicates += 1
+                    continue
+
+                words = [word for word in self.word_tokenize(sentence.lower())
+                         if word.isalpha() and word not in self.stop_words]
+                counts = Counter(words)
+                # Higher frequencies raise the score of every earlier sentence using those words
+                for word, count in counts.items():
+                    for other, other_count in self.postings[word]:
+                        self.freq_sums[other] += other_count * count
+                    self.word_freq[word] += count
+                    self.postings[word].append((index, count))
+
+                n = len(words)
+                self.sentences.append(sentence)
+                self.word_counts.append(n)
+                self.freq_sums.append(float(sum(self.word_freq[word] * count for word, count in counts.items())))
+                length_score = min(n / 20, 1.0) if n > 5 else 0.5
+                keyword_score = len(counts) / n if n else 0.0
+                self.static_scores.append(length_score * 0.2 + keyword_score * 0.2)
+                self.penalties.append(0.5 if n < 5 or n > 50 else 1.0)
+                added += 1
+            self.duplicates += duplicates
+            self.updated = time.time()
+        return added, duplicates
+
+    def scores(self):
+        """Current score of every sentence (-inf for sentences without content words)"""
+        with self.lock:
+            total = len(self.sentences)
+            if not total:
+                return np.zeros(0)
+            word_counts = np.array(self.word_counts, dtype=np.float64)
+            freq_scores = np.divide(np.array(self.freq_sums), word_counts,
+                                    out=np.zeros(total), where=word_counts > 0)
+            position_scores = 1.0 - (np.arange(total) / total) * 0.5
+            scores = (freq_scores * 0.4 + position_scores * 0.2 + np.array(self.static_scores)) * \
+                np.array(self.penalties)
+            scores[word_counts == 0] = -np.inf
+            return scores
+
+    def top_sentences(self, count):
+        """The `count` best sentences in their original order"""
+        scores = self.scores()
+        candidates = int(np.isfinite(scores).sum())
+        count = min(count, candidates)
+        if count <= 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        with self.lock:
+            return [self.sentences[i] for i in sorted(top)]
+
+    def __getstate__(self):
+        # The tokenizer, stop words and lock belong to the process; stores re-attach them on load
+        with self.lock:
+            state = self.__dict__.copy()
+        for name in ('word_tokenize', 'stop_words', 'lock'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.word_tokenize = None
+        self.stop_words = frozenset()
+        self.lock = threading.Lock()
+
+    def status(self):
+        with self.lock:
+            return {
+                "sentences": len(self.sentences),
+                "duplicate_sentences": self.duplicates,
+                "vocabulary": len(self.word_freq),
+                "updated": self.updated
+            }
+
+
+class SessionStore:
+    """In-process sessions that expire after `ttl` seconds without updates"""
+
+    def __init__(self, factory, ttl=1800, max_sessions=100):
+        self.factory = factory
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self):
+        session = self.factory()
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._purge_locked()
+            self._sessions[session_id] = session
+            # The least recently updated session goes first once the cap is reached
+            while len(self._sessions) > self.max_sessions:
+                del self._sessions[min(self._sessions, key=lambda key: self._sessions[key].updated)]
+        return session_id, session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and session.updated + self.ttl < time.time():
+                del self._sessions[session_id]
+                return None
+            return session
+
+    def update(self, session_id, change):
+        """Apply change(session); returns (session, result), or None if the session is gone"""
+        session = self.get(session_id)
+        if session is None:
+            return None
+        return session, change(session)
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _purge_locked(self):
+        now = time.time()
+        for session_id in [key for key, session in self._sessions.items() if session.updated + self.ttl < now]:
+            del self._sessions[session_id]
+
+
+class SQLiteSessionStore:
+    """Sessions pickled into a SQLite file, so every worker can serve every session.
+
+    An update loads, changes and saves its session inside one write transaction,
+    so frames of the same session arriving on different workers are applied one
+    after the other instead of overwriting each other.
+    """
+
+    def __init__(self, path, factory, ttl=1800, max_sessions=100):
+        self.path = path
+        self.factory = factory
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._template = None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state BLOB, updated REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+
+    def _connect(self):
+        # Autocommit connections; writes open their own BEGIN IMMEDIATE transaction
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _load(self, state):
+        session = pickle.loads(state)
+        if self._template is None:
+            self._template = self.factory()
+        session.word_tokenize = self._template.word_tokenize
+        session.stop_words = self._template.stop_words
+        return session
+
+    def _select(self, conn, session_id):
+        row = conn.execute("SELECT state, updated FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None or row[1] + self.ttl < time.time():
+            return None
+        return self._load(row[0])
+
+    def create(self):
+        session = self.factory()
+        session_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl,))
+            conn.execute("INSERT INTO sessions (id, state, updated) VALUES (?, ?, ?)",
+                         (session_id, pickle.dumps(session), session.updated))
+            # The least recently updated sessions go first once the cap is reached
+            conn.execute("DELETE FROM sessions WHERE id IN "
+                         "(SELECT id FROM sessions ORDER BY updated DESC LIMIT -1 OFFSET ?)", (self.max_sessions,))
+            conn.execute("COMMIT")
+        return session_id, session
+
+    def get(self, session_id):
+        with closing(self._connect()) as conn:
+            return self._select(conn, session_id)
+
+    def update(self, session_id, change):
+        """Apply change(session) and save it; returns (session, result), or None if the session is gone"""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                session = self._select(conn, session_id)
+                if session is None:
+                    return None
+                result = change(session)
+                conn.execute("UPDATE sessions SET state = ?, updated = ? WHERE id = ?",
+                             (pickle.dumps(session), session.updated, session_id))
+                conn.execute("COMMIT")
+                return session, result
+            finally:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+
+    def delete(self, session_id):
+        with closing(self._connect()) as conn:
+            return conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+
+def create_session_store(backend, factory, ttl=1800, max_sessions=100, path=None):
+    """Build the configured session store; path is the SQLite file for the sqlite backend"""
+    if backend not in BACKENDS:
+        print(f"Unknown camera session store '{backend}', using memory")
+        backend = 'memory'
+    if backend == 'sqlite':
+        return SQLiteSessionStore(path or 'camera_sessions.sqlite3', factory, ttl, max_sessions)
+    return SessionStore(factory, ttl, max_sessions)
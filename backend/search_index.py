@@ -0,0 +1,148 @@
+"""Full-text search over extracted documents, backed by SQLite FTS5.
+
+Every extraction result is stored once per (source hash, model, language) with
+its per-page text; searches return BM25-ranked pages with highlighted snippets.
+"""
+import html
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS documents ("
+    "id INTEGER PRIMARY KEY, source_hash TEXT, kind TEXT, filename TEXT, model TEXT, language TEXT, "
+    "page_count INTEGER, document_id TEXT, created REAL)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS documents_source ON documents (source_hash, model, language)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5("
+    "text, doc_id UNINDEXED, page UNINDEXED, tokenize='unicode61 remove_diacritics 2')",
+)
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# snippet() marks matches with private-use characters, which OCR text never contains,
+# so the page text can be HTML-escaped before they are turned into <mark> tags
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+
+def highlight_snippet(snippet):
+    """HTML-escape a raw snippet and turn its match markers into <mark> tags"""
+    return html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def build_match_query(query, match='all'):
+    """Turn free text into a safe FTS5 query: every word is quoted, then ANDed or ORed.
+
+    A trailing '*' on a word is kept as a prefix search.
+    """
+    terms = []
+    for token in query.split():
+        prefix = token.endswith('*')
+        for word in WORD_PATTERN.findall(token):
+            terms.append(f'"{word}"')
+        if prefix and terms:
+            terms[-1] += '*'
+    return (' OR ' if match == 'any' else ' ').join(terms)
+
+
+class SearchIndex:
+    def __init__(self, path):
+        self.path = path
+        # Serializes writers within this process; SQLite handles other processes
+        self._write_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def add(self, pages, source_hash, kind='ocr', filename='', model='', language='', document_id=None):
+        """Index the pages of one extraction result and return its index id.
+
+        Re-indexing the same source with the same model and language replaces
+        the earlier entry instead of adding a duplicate.
+        """
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT id FROM documents WHERE source_hash = ? AND model = ? AND language = ?",
+                (source_hash, model, language)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM pages WHERE doc_id = ?", (row[0],))
+                conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+            cursor = conn.execute(
+                "INSERT INTO documents (source_hash, kind, filename, model, language, page_count, document_id, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source_hash, kind, filename, model, language, len(pages), document_id, time.time()))
+            doc_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO pages (text, doc_id, page) VALUES (?, ?, ?)",
+                [(text, doc_id, number) for number, text in enumerate(pages, start=1) if text and text.strip()])
+        return doc_id
+
+    def search(self, query, page=1, per_page=10, language=None, kind=None, match='all'):
+        """Return (total, hits) for one page of BM25-ranked results"""
+        match_query = build_match_query(query, match)
+        if not match_query:
+            return 0, []
+        where = "pages MATCH ?"
+        params = [match_query]
+        if language:
+            where += " AND documents.language = ?"
+            params.append(language)
+        if kind:
+            where += " AND documents.kind = ?"
+            params.append(kind)
+        join = "FROM pages JOIN documents ON documents.id = pages.doc_id"
+
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT count(*) {join} WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT documents.id, documents.filename, documents.kind, documents.model, documents.language, "
+                f"documents.source_hash, documents.document_id, documents.created, pages.page, "
+                f"snippet(pages, 0, ?, ?, '...', 16), bm25(pages) "
+                f"{join} WHERE {where} ORDER BY bm25(pages) LIMIT ? OFFSET ?",
+                [MARK_START, MARK_END] + params + [per_page, (page - 1) * per_page]).fetchall()
+
+        hits = [{
+            "index_id": row[0],
+            "filename": row[1],
+            "kind": row[2],
+            "model": row[3],
+            "language": row[4],
+            "source_hash": row[5],
+            "document_id": row[6],
+            "created": row[7],
+            "page": row[8],
+            "snippet": highlight_snippet(row[9]),
+            # bm25() is lower-is-better; flip it so clients can sort descending
+            "score": round(-row[10], 6)
+        } for row in rows]
+        return total, hits
+
+    def get(self, index_id):
+        """Return an indexed document with its pages, or None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, source_hash, kind, filename, model, language, page_count, document_id, created "
+                "FROM documents WHERE id = ?", (index_id,)).fetchone()
+            if row is None:
+                return None
+            pages = conn.execute(
+                "SELECT page, text FROM pages WHERE doc_id = ? ORDER BY page", (index_id,)).fetchall()
+        keys = ("index_id", "source_hash", "kind", "filename", "model", "language", "page_count", "document_id",
+                "created")
+        document = dict(zip(keys, row))
+        document["pages"] = [{"page": page, "text": text} for page, text in pages]
+        return document
+
+    def delete(self, index_id):
+        """Remove an indexed document and its pages; returns False if it did not exist"""
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM pages WHERE doc_id = ?", (index_id,))
+            return conn.execute("DELETE FROM documents WHERE id = ?", (index_id,)).rowcount > 0
@@ -0,0 +1,116 @@
+import importlib
+import sys
+import threading
+import time
+import traceback
+import types
+
+from executors import gevent_active
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is not None:
+            return module
+        with self.__dict__['_lazy_lock']:
+            module = self.__dict__['_lazy_module']
+            if module is None:
+                module = importlib.import_module(self.__name__)
+                # Copy attributes over so later lookups skip __getattr__
+                self.__dict__.update(module.__dict__)
+                self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    @property
+    def is_loaded(self):
+        return self.__dict__['_lazy_module'] is not None
+
+
+def lazy_import(name):
+    """Return the module if it is already imported, otherwise a LazyModule for it"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+class Warmup:
+    """Runs a list of named warmup tasks once, either in the foreground or on a background thread"""
+
+    def __init__(self, tasks=None):
+        self.tasks = list(tasks or [])
+        self.state = 'pending'  # pending, running, ready, failed
+        self.completed = []
+        self.errors = {}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add_task(self, name, func):
+        self.tasks.append((name, func))
+
+    def run(self):
+        """Run all tasks in the calling thread (used to preload before forking workers)"""
+        with self._lock:
+            if self.state in ('running', 'ready'):
+                return self.state == 'ready'
+            self.state = 'running'
+            self.started_at = time.time()
+
+        for name, func in self.tasks:
+            try:
+                func()
+                self.completed.append(name)
+            except Exception as e:
+                print(f"Error during warmup task '{name}': {e}")
+                traceback.print_exc()
+                self.errors[name] = str(e)
+
+        self.finished_at = time.time()
+        self.state = 'failed' if self.errors else 'ready'
+        return self.state == 'ready'
+
+    def start(self):
+        """Run all tasks on a background OS thread so the server can start listening immediately"""
+        with self._lock:
+            if self._thread is not None or self.state != 'pending':
+                return
+            if gevent_active():
+                # A patched Thread would be a greenlet, and model loading never yields, so
+                # it would stall the worker's event loop; gevent's pool runs a real thread
+                from gevent import get_hub
+                self._thread = get_hub().threadpool.spawn(self.run)
+                return
+            self._thread = threading.Thread(target=self.run, name='model-warmup', daemon=True)
+        self._thread.start()
+
+    def mark_ready(self):
+        """Skip warmup entirely; models are then loaded on first use"""
+        self.state = 'ready'
+
+    @property
+    def is_ready(self):
+        return self.state == 'ready'
+
+    def status(self):
+        duration = None
+        if self.started_at:
+            duration = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {
+            "state": self.state,
+            "completed": list(self.completed),
+            "pending": [name for name, _ in self.tasks if name not in self.completed and name not in self.errors],
+            "errors": dict(self.errors),
+            "duration_seconds": duration
+        }
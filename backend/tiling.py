@@ -0,0 +1,261 @@
+"""Overlapping-tile OCR for very large scans.
+
+The page is cut into tiles that overlap by at least one text line, each tile
+is recognized independently (in parallel), and the per-tile results are
+shifted back to page coordinates, de-duplicated, stitched across tile seams
+and put back into reading order. Results use EasyOCR's readtext format:
+(box, text, confidence) with box as four [x, y] corner points.
+"""
+
+
+def tile_grid(width, height, tile_size, overlap):
+    """Return (x0, y0, x1, y1) tiles covering the page with the given overlap"""
+    step = max(1, tile_size - overlap)
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+
+def _rect(box):
+    xs = [point[0] for point in box]
+    ys = [point[1] for point in box]
+    return [float(min(xs)), float(min(ys)), float(max(xs)), float(max(ys))]
+
+
+def _area(rect):
+    return max(0.0, rect[2] - rect[0]) * max(0.0, rect[3] - rect[1])
+
+
+def _intersection(a, b):
+    return _area([max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])])
+
+
+def _vertical_overlap(a, b):
+    overlap = min(a[3], b[3]) - max(a[1], b[1])
+    return overlap / max(1.0, min(a[3] - a[1], b[3] - b[1]))
+
+
+def _join_text(left, right):
+    """Join two fragments of one line, dropping the words both tiles recognized"""
+    left_words, right_words = left.split(), right.split()
+    for size in range(min(len(left_words), len(right_words)), 0, -1):
+        if left_words[-size:] == right_words[:size]:
+            return ' '.join(left_words + right_words[size:])
+    return ' '.join(left_words + right_words)
+
+
+def _touches_seam(rect, tile, page_width, page_height, margin):
+    """True if the box runs into an edge of its tile that is not a page edge"""
+    x0, y0, x1, y1 = tile
+    return ((x0 > 0 and rect[0] - x0 <= margin) or (x1 < page_width and x1 - rect[2] <= margin) or
+            (y0 > 0 and rect[1] - y0 <= margin) or (y1 < page_height and y1 - rect[3] <= margin))
+
+
+def _straddles_seam(left, right):
+    """True if two same-line fragments from neighbouring tiles are pieces of one detection"""
+    slack = max(left['rect'][3] - left['rect'][1], right['rect'][3] - right['rect'][1])
+    left_tile_end = left['tile'][2]
+    right_tile_start = right['tile'][0]
+    if not (right_tile_start < left_tile_end and
+            left['rect'][2] + slack >= right_tile_start and
+            right['rect'][0] - slack <= left_tile_end):
+        return False
+    # Overlapping fragments repeat the words in the overlap; a small gap only counts
+    # when it spans the whole overlap strip, i.e. a word too wide for either tile was lost
+    gap = right['rect'][0] - left['rect'][2]
+    return gap < 0 or (gap <= slack and left['rect'][2] <= right_tile_start and right['rect'][0] >= left_tile_end)
+
+
+class _DisjointSet:
+    """Union-find over item indexes, used to join fragments of one line across seams"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, index):
+        while self.parent[index] != index:
+            self.parent[index] = self.parent[self.parent[index]]
+            index = self.parent[index]
+        return index
+
+    def union(self, a, b):
+        self.parent[self.find(b)] = self.find(a)
+
+
+def _drop_contained(items, containment, cell_size):
+    """Drop detections that sit inside a larger one: the same text seen in the overlap
+    strip, or a copy cut by a seam when the neighbouring tile saw it whole. A piece
+    cut by one tile that reaches past the piece its neighbour cut is kept for stitching.
+
+    Kept boxes are bucketed on a grid of `cell_size` pixels, so each detection is
+    only compared with the kept boxes that share a cell with it.
+    """
+    items.sort(key=lambda item: (item['cut'], -_area(item['rect'])))
+    grid = {}
+    kept = []
+    for item in items:
+        rect = item['rect']
+        cells = [(cx, cy)
+                 for cx in range(int(rect[0] // cell_size), int(rect[2] // cell_size) + 1)
+                 for cy in range(int(rect[1] // cell_size), int(rect[3] // cell_size) + 1)]
+        area = _area(rect) or 1.0
+        seen = set()
+        duplicate = False
+        for cell in cells:
+            for index in grid.get(cell, ()):
+                if index not in seen:
+                    seen.add(index)
+                    other = kept[index]
+                    if (item['cut'] and other['cut'] and item['tile'][0] != other['tile'][0] and
+                            (rect[0] < other['rect'][0] or rect[2] > other['rect'][2])):
+                        continue  # two pieces of a line cut by a vertical seam, stitched below
+                    if _intersection(rect, other['rect']) / area >= containment:
+                        duplicate = True
+                        break
+            if duplicate:
+                break
+        if not duplicate:
+            for cell in cells:
+                grid.setdefault(cell, []).append(len(kept))
+            kept.append(item)
+    return kept
+
+
+def _seam_pairs(items):
+    """Yield (left, right) index pairs of same-line fragments cut by a vertical seam.
+
+    Only detections from neighbouring tile columns that reach into the overlap strip
+    between them are compared, sweeping the strip top to bottom so each detection
+    only meets the ones whose vertical extent it shares.
+    """
+    columns = {}
+    for index, item in enumerate(items):
+        columns.setdefault((item['tile'][0], item['tile'][2]), []).append(index)
+    spans = sorted(columns)
+    for left_span, right_span in zip(spans, spans[1:]):
+        strip_start, strip_end = right_span[0], left_span[1]
+        if strip_start >= strip_end:
+            continue
+        candidates = columns[left_span] + columns[right_span]
+        # _straddles_seam allows a gap of up to one line height on either side of the strip
+        slack = max(items[index]['rect'][3] - items[index]['rect'][1] for index in candidates)
+        strip = sorted((index for index in candidates
+                        if items[index]['rect'][2] + slack >= strip_start and
+                        items[index]['rect'][0] - slack <= strip_end),
+                       key=lambda index: items[index]['rect'][1])
+        active = []
+        for index in strip:
+            rect = items[index]['rect']
+            active = [other for other in active if items[other]['rect'][3] > rect[1]]
+            for other in active:
+                left, right = items[other], items[index]
+                if left['tile'] == right['tile']:
+                    continue
+                if left['rect'][0] > right['rect'][0]:
+                    left, right = right, left
+                if _vertical_overlap(left['rect'], right['rect']) >= 0.5 and _straddles_seam(left, right):
+                    yield other, index
+            active.append(index)
+
+
+def _stitch(fragments):
+    """Join the fragments of one line, left to right, into a single detection"""
+    fragments = sorted(fragments, key=lambda item: item['rect'][0])
+    text = fragments[0]['text']
+    for fragment in fragments[1:]:
+        text = _join_text(text, fragment['text'])
+    rects = [fragment['rect'] for fragment in fragments]
+    tiles = [fragment['tile'] for fragment in fragments]
+    return {
+        'rect': [min(r[0] for r in rects), min(r[1] for r in rects), max(r[2] for r in rects), max(r[3] for r in rects)],
+        'text': text,
+        'confidence': min(fragment['confidence'] for fragment in fragments),
+        # The stitched line spans all of its tiles
+        'tile': (min(t[0] for t in tiles), min(t[1] for t in tiles), max(t[2] for t in tiles), max(t[3] for t in tiles)),
+        'cut': all(fragment['cut'] for fragment in fragments)
+    }
+
+
+def merge_tile_results(tile_results, page_width, page_height, overlap, containment=0.8, seam_margin=3):
+    """Combine per-tile detections (already in page coordinates) into one result list.
+
+    tile_results is a list of (tile, detections) pairs.
+    """
+    items = []
+    for tile, detections in tile_results:
+        for box, text, confidence in detections:
+            rect = _rect(box)
+            items.append({
+                'rect': rect, 'text': text, 'confidence': float(confidence), 'tile': tile,
+                'cut': _touches_seam(rect, tile, page_width, page_height, seam_margin)
+            })
+
+    # 1. Drop copies of the same text seen by more than one tile
+    kept = _drop_contained(items, containment, max(64, overlap))
+
+    # 2. Stitch fragments of one line that was cut by a vertical seam; chains of
+    #    fragments across several seams end up in one set
+    fragments = _DisjointSet(len(kept))
+    for left, right in _seam_pairs(kept):
+        fragments.union(left, right)
+    groups = {}
+    for index, item in enumerate(kept):
+        groups.setdefault(fragments.find(index), []).append(item)
+    stitched = [group[0] if len(group) == 1 else _stitch(group) for group in groups.values()]
+
+    results = []
+    for item in reading_order(stitched):
+        x0, y0, x1, y1 = item['rect']
+        results.append(([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], item['text'], item['confidence']))
+    return results
+
+
+def reading_order(items):
+    """Sort detections top-to-bottom by line, then left-to-right within a line"""
+    lines = []
+    # Items come in top-edge order, so a line whose first item ends above the
+    # current item can never take another one and is skipped from then on
+    first_open = 0
+    for item in sorted(items, key=lambda item: item['rect'][1]):
+        while first_open < len(lines) and lines[first_open][0]['rect'][3] <= item['rect'][1]:
+            first_open += 1
+        for line in lines[first_open:]:
+            if _vertical_overlap(line[0]['rect'], item['rect']) >= 0.5:
+                line.append(item)
+                break
+        else:
+            lines.append([item])
+    ordered = []
+    for line in lines:
+        ordered.extend(sorted(line, key=lambda item: item['rect'][0]))
+    return ordered
+
+
+def ocr_tiled(image, recognize, tile_size=1600, overlap=200, executor=None):
+    """Recognize a large image tile by tile.
+
+    recognize(tile_image) must return readtext-style results for the tile;
+    tiles are submitted to `executor` (a concurrent.futures executor) when given.
+    """
+    height, width = image.shape[:2]
+    tiles = tile_grid(width, height, tile_size, overlap)
+
+    def run(tile):
+        x0, y0, x1, y1 = tile
+        results = recognize(image[y0:y1, x0:x1])
+        shifted = [([[point[0] + x0, point[1] + y0] for point in box], text, confidence)
+                   for box, text, confidence in results]
+        return tile, shifted
+
+    if executor is None:
+        tile_results = [run(tile) for tile in tiles]
+    else:
+        tile_results = list(executor.map(run, tiles))
+    return merge_tile_results(tile_results, width, height, overlap), len(tiles)
@@ -0,0 +1,139 @@
+"""Memory-bounded upload handling.
+
+Multipart file parts are spooled to disk above a small threshold instead of
+being buffered in RAM, uploads are saved to unique temporary files, PDFs are
+parsed through a read-only memory map, and image dimensions are checked from
+the file header before any pixels are decoded.
+"""
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from flask import Request
+from PIL import Image
+
+
+class UploadTooLarge(Exception):
+    """Raised for uploads that exceed a configured limit; handlers turn this into a 413"""
+
+
+def make_request_class(spool_threshold, spool_dir=None, max_form_memory_size=None):
+    """Flask request class that spools file parts larger than spool_threshold bytes to spool_dir"""
+
+    class SpooledRequest(Request):
+        def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+            return tempfile.SpooledTemporaryFile(max_size=spool_threshold, dir=spool_dir, mode='rb+')
+
+    if max_form_memory_size:
+        # Caps non-file form fields, which are always held in memory
+        SpooledRequest.max_form_memory_size = max_form_memory_size
+    return SpooledRequest
+
+
+def spool_upload(file_storage, directory=None):
+    """Copy an uploaded file to a unique temporary file and return its path.
+
+    The copy is streamed in chunks; the caller removes the file when done.
+    """
+    _, extension = os.path.splitext(file_storage.filename or '')
+    fd, path = tempfile.mkstemp(suffix=extension.lower()[:10], prefix='upload_', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            file_storage.save(f)
+    except Exception:
+        remove_quietly(path)
+        raise
+    return path
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@contextmanager
+def mapped_file(path):
+    """Read-only memory map of a file; pages are loaded by the OS on access instead of copied"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def check_image_dimensions(source, max_pixels):
+    """Read width and height from the image header and reject images over max_pixels.
+
+    source is a path or a binary file object; returns (width, height).
+    """
+    try:
+        with Image.open(source) as img:
+            width, height = img.size
+    except Image.DecompressionBombError:
+        raise UploadTooLarge(f"Image exceeds the {max_pixels} pixel limit")
+    except (OSError, ValueError, SyntaxError):
+        raise ValueError("Unreadable or unsupported image file")
+    if width * height > max_pixels:
+        raise UploadTooLarge(f"Image is {width}x{height} pixels; the limit is {max_pixels} pixels")
+    return width, height
+
+
+def _read_status_kb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class PeakMemoryTracker:
+    """Peak resident memory of the worker process while requests are running.
+
+    On Linux the high-water mark is reset whenever the worker goes from idle
+    to busy, so a request running alone reports its own peak; overlapping
+    requests share one window. Elsewhere the process lifetime peak is reported.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.resettable = os.path.exists('/proc/self/clear_refs')
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        try:
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')
+        except OSError:
+            self.resettable = False
+
+    def start(self):
+        with self._lock:
+            if self.active == 0 and self.resettable:
+                self._reset()
+            self.active += 1
+
+    def stop(self):
+        """End a request and return the peak RSS in bytes (None if unavailable)"""
+        with self._lock:
+            self.active = max(0, self.active - 1)
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    peak_kb = _read_status_kb('VmHWM')
+    if peak_kb is not None:
+        return peak_kb * 1024
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
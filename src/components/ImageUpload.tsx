@@ -14,6 +14,7 @@ const ImageUpload: React.FC<Props> = ({ onBack, onSummarize }) => {
   const [selectedImage, setSelectedImage] = useState<File | null>(null);
   const [previewUrl, setPreviewUrl] = useState<string | null>(null);
   const [recognizedText, setRecognizedText] = useState<string>('');
+  const [documentId, setDocumentId] = useState<string | null>(null);
   const [isProcessing, setIsProcessing] = useState(false);
   const [isDownloading, setIsDownloading] = useState(false);
   const [isDragging, setIsDragging] = useState(false);
@@ -60,6 +61,7 @@ const ImageUpload: React.FC<Props> = ({ onBack, onSummarize }) => {
     try {
       const response = await axios.post('http://localhost:5000/upload_image', formData);
       setRecognizedText(response.data.recognized_text);
+      setDocumentId(response.data.document_id || null);
     } catch (error) {
       console.error('Error uploading image:', error);
     }
@@ -80,16 +82,21 @@ const ImageUpload: React.FC<Props> = ({ onBack, onSummarize }) => {
         }
       } else {
         formData.append('format', format);
-        formData.append('text_data', recognizedText);
+        // The server already holds the text; only send it if it was not stored
+        if (documentId) {
+          formData.append('document_id', documentId);
+        } else {
+          formData.append('text_data', recognizedText);
+        }
       }
 
       const endpoint = format === 'idcard' 
         ? 'http://localhost:5000/extract_id_data' 
         : 'http://localhost:5000/download_format';
 
-      const response = await axios.post(
+      const post = (data: FormData) => axios.post(
         endpoint,
-        formData,
+        data,
         {
           responseType: 'blob',
           headers: {
@@ -98,6 +105,21 @@ const ImageUpload: React.FC<Props> = ({ onBack, onSummarize }) => {
         }
       );
 
+      let response;
+      try {
+        response = await post(formData);
+      } catch (error) {
+        // Stored documents expire and may live on another worker; fall back to sending the text
+        if (format !== 'idcard' && documentId && axios.isAxiosError(error) && error.response?.status === 404) {
+          const fallbackData = new FormData();
+          fallbackData.append('format', format);
+          fallbackData.append('text_data', recognizedText);
+          response = await post(fallbackData);
+        } else {
+          throw error;
+        }
+      }
+
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
       link.href = url;
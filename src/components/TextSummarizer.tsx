@@ -27,6 +27,8 @@ interface OpenRouterStatus {
 
 interface SummaryResult {
   original_text: string;
+  document_id?: string | null;
+  source_document_id?: string | null;
   summary: string;
   algorithm: string;
   smart_option: string;
@@ -44,6 +46,8 @@ interface SummaryResult {
 
 const TextSummarizer: React.FC<Props> = ({ onBack, initialText = '' }) => {
   const [inputText, setInputText] = useState<string>(initialText);
+  // Text extracted from an uploaded PDF is already stored server-side under this id
+  const [extractedDocument, setExtractedDocument] = useState<{ id: string; text: string } | null>(null);
   const [summaryResult, setSummaryResult] = useState<SummaryResult | null>(null);
   const [isProcessing, setIsProcessing] = useState(false);
   const [isDownloading, setIsDownloading] = useState(false);
@@ -93,6 +97,7 @@ const TextSummarizer: React.FC<Props> = ({ onBack, initialText = '' }) => {
       reader.onload = (e) => {
         const content = e.target?.result as string;
         setInputText(content);
+        setExtractedDocument(null);
         setUploadStatus(`Loaded ${content.split(' ').length} words from ${file.name}`);
         setTimeout(() => setUploadStatus(''), 3000);
       };
@@ -112,6 +117,7 @@ const TextSummarizer: React.FC<Props> = ({ onBack, initialText = '' }) => {
         });
 
         setInputText(response.data.text);
+        setExtractedDocument(response.data.document_id ? { id: response.data.document_id, text: response.data.text } : null);
         setUploadStatus(`Extracted ${response.data.word_count} words from ${response.data.filename}`);
         setTimeout(() => setUploadStatus(''), 3000);
       } catch (error) {
@@ -131,15 +137,32 @@ const TextSummarizer: React.FC<Props> = ({ onBack, initialText = '' }) => {
 
     setIsProcessing(true);
     try {
-      const response = await axios.post('http://localhost:5000/summarize_text', {
-        text: inputText,
+      const settings = {
         algorithm: selectedAlgorithm,
         smart_option: selectedSmartOption,
         type: selectedType,
         length: selectedLength
-      });
+      };
+      const post = (source: { text: string } | { document_id: string }) =>
+        axios.post('http://localhost:5000/summarize_text', { ...source, ...settings });
 
-      setSummaryResult(response.data);
+      // Unedited PDF text is referenced by id instead of being uploaded again
+      const documentId = extractedDocument && extractedDocument.text === inputText ? extractedDocument.id : null;
+      let response;
+      try {
+        response = await post(documentId ? { document_id: documentId } : { text: inputText });
+      } catch (error) {
+        // Stored documents expire and may live on another worker; fall back to sending the text
+        if (documentId && axios.isAxiosError(error) && error.response?.status === 404) {
+          setExtractedDocument(null);
+          response = await post({ text: inputText });
+        } else {
+          throw error;
+        }
+      }
+
+      // The server no longer echoes the original text; keep the local copy
+      setSummaryResult({ ...response.data, original_text: response.data.original_text ?? inputText });
       setShowComparison(true);
 
       // Refresh OpenRouter status after request
@@ -179,12 +202,6 @@ const TextSummarizer: React.FC<Props> = ({ onBack, initialText = '' }) => {
 
     setIsDownloading(true);
     try {
-      const formData = new FormData();
-      formData.append('format', format);
-      formData.append('text_data', summaryResult.summary);
-      formData.append('original_text', summaryResult.original_text);
-      formData.append('is_summary', 'true');
-      
       const statsText = `
 Word Count Reduction: ${summaryResult.statistics.reduction_percentage}%
 Original: ${summaryResult.statistics.original_word_count} words (${summaryResult.statistics.original_reading_time_minutes} min read)
@@ -193,10 +210,23 @@ Algorithm: ${options?.algorithms[summaryResult.algorithm] || summaryResult.algor
 Type: ${options?.types[summaryResult.type] || summaryResult.type}
 Length: ${options?.lengths[summaryResult.length] || summaryResult.length}
       `.trim();
-      
-      formData.append('statistics', statsText);
 
-      const response = await axios.post(
+      const buildFormData = (useDocumentId: boolean) => {
+        const formData = new FormData();
+        formData.append('format', format);
+        if (useDocumentId && summaryResult.document_id) {
+          // Summary and original text are stored server-side
+          formData.append('document_id', summaryResult.document_id);
+        } else {
+          formData.append('text_data', summaryResult.summary);
+          formData.append('original_text', summaryResult.original_text);
+        }
+        formData.append('is_summary', 'true');
+        formData.append('statistics', statsText);
+        return formData;
+      };
+      
+      const post = (formData: FormData) => axios.post(
         'http://localhost:5000/download_format',
         formData,
         {
@@ -207,6 +237,18 @@ Length: ${options?.lengths[summaryResult.length] || summaryResult.length}
         }
       );
 
+      let response;
+      try {
+        response = await post(buildFormData(true));
+      } catch (error) {
+        // Stored documents expire and may live on another worker; fall back to sending the text
+        if (summaryResult.document_id && axios.isAxiosError(error) && error.response?.status === 404) {
+          response = await post(buildFormData(false));
+        } else {
+          throw error;
+        }
+      }
+
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
       link.href = url;